@@ -77,7 +77,7 @@ async def create_tables(language: str = "es") -> None:
         # Schema creation
         await conn.execute(f"""
             CREATE TABLE IF NOT EXISTS search_runs{lang_suffix} (
-                id TEXT PRIMARY KEY,
+                id UUID PRIMARY KEY,
                 query TEXT,
                 mode TEXT,
                 started_at TIMESTAMPTZ,
@@ -89,7 +89,7 @@ async def create_tables(language: str = "es") -> None:
         await conn.execute(f"""
             CREATE TABLE IF NOT EXISTS videos_raw{lang_suffix} (
                 video_id TEXT PRIMARY KEY,
-                search_run_id TEXT REFERENCES search_runs{lang_suffix}(id),
+                search_run_id UUID REFERENCES search_runs{lang_suffix}(id),
                 query TEXT,
                 video_url TEXT,
                 channel_url TEXT,
@@ -103,6 +103,24 @@ async def create_tables(language: str = "es") -> None:
             );
         """)
 
+        # Older databases stored run ids as 36-char TEXT; convert them to native 16-byte UUIDs.
+        await conn.execute(f"""
+            DO $$
+            BEGIN
+                -- Serialize concurrent workers so only one of them runs the conversion.
+                PERFORM pg_advisory_xact_lock(hashtext('search_runs{lang_suffix}.id'));
+                IF (SELECT data_type FROM information_schema.columns
+                    WHERE table_schema = current_schema()
+                      AND table_name = 'search_runs{lang_suffix}' AND column_name = 'id') = 'text' THEN
+                    ALTER TABLE videos_raw{lang_suffix} DROP CONSTRAINT IF EXISTS videos_raw{lang_suffix}_search_run_id_fkey;
+                    ALTER TABLE search_runs{lang_suffix} ALTER COLUMN id TYPE UUID USING id::uuid;
+                    ALTER TABLE videos_raw{lang_suffix} ALTER COLUMN search_run_id TYPE UUID USING search_run_id::uuid;
+                    ALTER TABLE videos_raw{lang_suffix} ADD CONSTRAINT videos_raw{lang_suffix}_search_run_id_fkey
+                        FOREIGN KEY (search_run_id) REFERENCES search_runs{lang_suffix}(id);
+                END IF;
+            END $$;
+        """)
+
         # videos_normalized
         await conn.execute(f"""
             CREATE TABLE IF NOT EXISTS videos_normalized{lang_suffix} (
@@ -161,6 +179,7 @@ async def create_tables(language: str = "es") -> None:
 
         # Indices
         indices = [
+            f"CREATE INDEX IF NOT EXISTS idx_search_runs{lang_suffix}_query ON search_runs{lang_suffix} (query);",
             f"CREATE INDEX IF NOT EXISTS idx_videos_raw{lang_suffix}_channel_url ON videos_raw{lang_suffix} (channel_url);",
             f"CREATE INDEX IF NOT EXISTS idx_videos_raw{lang_suffix}_discovered_at ON videos_raw{lang_suffix} (discovered_at);",
             f"CREATE INDEX IF NOT EXISTS idx_videos_raw{lang_suffix}_search_run_id ON videos_raw{lang_suffix} (search_run_id);",
@@ -219,7 +238,7 @@ async def create_search_run(query: str, mode: str = "exploration") -> uuid.UUID:
     table_name = _get_table_name("search_runs")
     await pool.execute(
         f"INSERT INTO {table_name} (id, query, mode, started_at) VALUES ($1, $2, $3, $4)",
-        str(run_id), query, mode, started_at
+        run_id, query, mode, started_at
     )
     return run_id
 
@@ -231,16 +250,38 @@ async def finish_search_run(search_run_id: uuid.UUID) -> None:
     table_name = _get_table_name("search_runs")
     await pool.execute(
         f"UPDATE {table_name} SET finished_at = $1 WHERE id = $2",
-        finished_at, str(search_run_id)
+        finished_at, search_run_id
     )
 
 
-async def get_executed_queries() -> set[str]:
-    """Return a set of distinct queries that have been logged in search_runs."""
+async def get_executed_queries() -> frozenset[str]:
+    """Return the distinct queries that have been logged in search_runs."""
     pool = _require_pool()
     table_name = _get_table_name("search_runs")
-    rows = await pool.fetch(f"SELECT DISTINCT query FROM {table_name}")
-    return {row["query"] for row in rows if row["query"]}
+    # GROUP BY over idx_search_runs_<lang>_query lets Postgres deduplicate from the index.
+    rows = await pool.fetch(f"SELECT query FROM {table_name} WHERE query IS NOT NULL GROUP BY query")
+    return frozenset(row[0] for row in rows if row[0])
+
+
+async def filter_pending(queries: list[str], limit: int | None = None) -> list[str]:
+    """Return the queries not yet logged in search_runs, preserving input order.
+
+    The membership test runs in Postgres, so only pending queries cross the wire.
+    With ``limit``, only the first ``limit`` pending queries are returned.
+    """
+    if not queries or (limit is not None and limit <= 0):
+        return []
+    pool = _require_pool()
+    table_name = _get_table_name("search_runs")
+    # LIMIT NULL means no limit in Postgres.
+    rows = await pool.fetch(f"""
+        SELECT q.query
+        FROM unnest($1::text[]) WITH ORDINALITY AS q(query, ord)
+        WHERE NOT EXISTS (SELECT 1 FROM {table_name} s WHERE s.query = q.query)
+        ORDER BY q.ord
+        LIMIT $2
+    """, queries, limit)
+    return [row[0] for row in rows]
 
 
 async def insert_videos_raw(search_run_id: uuid.UUID, videos: list[dict[str, Any]]) -> tuple[int, int]:
@@ -273,7 +314,7 @@ async def insert_videos_raw(search_run_id: uuid.UUID, videos: list[dict[str, Any
 
         tuples.append((
             vid,
-            str(search_run_id),
+            search_run_id,
             v.get("query"),
             video_url,
             channel_url,
@@ -359,48 +400,72 @@ async def fetch_unprocessed_videos_raw(limit: int | None = None) -> list[dict[st
     return [dict(row) for row in rows]
 
 
+# videos_normalized columns in insert order, with the Postgres array type each is bound as.
+_NORMALIZED_COLUMNS = (
+    ("video_id", "text"),
+    ("channel_url", "text"),
+    ("query", "text"),
+    ("views_estimated", "bigint"),
+    ("published_at_estimated", "timestamptz"),
+    ("duration_seconds_estimated", "bigint"),
+    ("validation_passed", "boolean"),
+    ("validation_reason", "text"),
+    ("normalized_at", "timestamptz"),
+)
+
+
 async def insert_videos_normalized(rows: list[dict[str, Any]]) -> tuple[int, int]:
     """Batch insert normalized videos."""
-    if not rows:
-        return (0, 0)
-    pool = _require_pool()
+    valid = [r for r in rows if r.get("video_id") and isinstance(r.get("video_id"), str)]
+    if not valid:
+        return (0, len(rows))
+    columns = {name: [r.get(name) for r in valid] for name, _ in _NORMALIZED_COLUMNS}
+    inserted, ignored = await insert_videos_normalized_columns(columns)
+    return inserted, ignored + len(rows) - len(valid)
 
-    tuples = []
-    seen = set()
-    for r in rows:
-        vid = r.get("video_id")
-        if not vid or not isinstance(vid, str):
-            continue
-        if vid in seen:
-            continue
-        seen.add(vid)
 
-        tuples.append((
-            vid,
-            r.get("channel_url"),
-            r.get("query"),
-            r.get("views_estimated"),
-            _ensure_datetime(r.get("published_at_estimated")),
-            r.get("duration_seconds_estimated"),
-            bool(r.get("validation_passed")),
-            r.get("validation_reason"),
-            _ensure_datetime(r.get("normalized_at")) or _utcnow()
-        ))
+async def insert_videos_normalized_columns(columns: dict[str, list[Any]]) -> tuple[int, int]:
+    """Batch insert normalized videos given column-wise (one equal-length list per column).
 
-    if not tuples:
+    Each column is bound as a single array parameter and expanded with unnest(), so the
+    batch is one statement and the returned inserted count is exact. Existing (or repeated)
+    video_ids are ignored.
+    """
+    total = len(columns["video_id"])
+    if not total:
         return (0, 0)
-    
+    pool = _require_pool()
+    # Rows without their own normalized_at share one batch timestamp.
+    now = _utcnow()
+
+    args = []
+    for name, _ in _NORMALIZED_COLUMNS:
+        values = columns[name]
+        if name == "published_at_estimated":
+            values = [_ensure_datetime(v) for v in values]
+        elif name == "normalized_at":
+            values = [_ensure_datetime(v) or now for v in values]
+        elif name == "validation_passed":
+            values = [bool(v) for v in values]
+        args.append(values)
+
     table_name = _get_table_name("videos_normalized")
+    names = ", ".join(name for name, _ in _NORMALIZED_COLUMNS)
+    arrays = ", ".join(f"${i}::{pg_type}[]" for i, (_, pg_type) in enumerate(_NORMALIZED_COLUMNS, 1))
     query = f"""
-        INSERT INTO {table_name} (
-            video_id, channel_url, query, views_estimated, published_at_estimated,
-            duration_seconds_estimated, validation_passed, validation_reason, normalized_at
-        ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
+        INSERT INTO {table_name} ({names})
+        SELECT * FROM unnest({arrays})
         ON CONFLICT (video_id) DO NOTHING
     """
-    
-    await pool.executemany(query, tuples)
-    return len(tuples), len(rows) - len(tuples)
+
+    status = await pool.execute(query, *args)
+    # Status is "INSERT 0 <rows>".
+    inserted = int(status.rsplit(" ", 1)[-1])
+    return inserted, total - inserted
+
+
+# Claim retries when a concurrent worker took the whole candidate window (see below).
+_CLAIM_ATTEMPTS = 5
 
 
 async def claim_channels_for_discovery(limit: int) -> list[str]:
@@ -409,56 +474,51 @@ async def claim_channels_for_discovery(limit: int) -> list[str]:
         return []
     pool = _require_pool()
 
-    # We need a transaction to be safe?
-    # The original implementation did SELECT then INSERT in standard autocommit mode (which sqlite might handle differently).
-    # To be atomic, we can do a CTE based update or simply lock.
-    # Or just select and try insertion.
-    
     videos_normalized_table = _get_table_name("videos_normalized")
     channels_processed_table = _get_table_name("channels_processed")
     channels_claims_table = _get_table_name("channels_discovery_claims")
-    
-    # 1. Select candidates
-    select_sql = f"""
-        SELECT n.channel_url
+
+    # Select + claim in a single statement. ON CONFLICT DO NOTHING drops rows another
+    # worker claimed concurrently, and RETURNING only yields the rows we actually inserted.
+    candidates = f"""
         FROM {videos_normalized_table} n
         LEFT JOIN {channels_processed_table} p ON p.channel_url = n.channel_url
         LEFT JOIN {channels_claims_table} c ON c.channel_url = n.channel_url
         WHERE n.validation_passed = TRUE
-          AND n.channel_url IS NOT NULL 
+          AND n.channel_url IS NOT NULL
           AND n.channel_url <> ''
           AND p.channel_url IS NULL
           AND c.channel_url IS NULL
+    """
+    claim_sql = f"""
+        INSERT INTO {channels_claims_table} (channel_url, claimed_at)
+        SELECT n.channel_url, $1
+        {candidates}
         GROUP BY n.channel_url
         ORDER BY MIN(n.normalized_at) ASC
-        LIMIT $1
+        LIMIT $2
+        ON CONFLICT DO NOTHING
+        RETURNING channel_url
     """
-
-    async with pool.acquire() as conn:
-        async with conn.transaction():
-            rows = await conn.fetch(select_sql, limit)
-            candidates = [r["channel_url"] for r in rows]
-            if not candidates:
-                return []
-
-            # 2. Insert into claims
-            claim_tuples = [(url, _utcnow()) for url in candidates]
-            
-            # Using ON CONFLICT DO NOTHING to handle races if multiple workers pick same
-            await conn.executemany(
-                f"INSERT INTO {channels_claims_table} (channel_url, claimed_at) VALUES ($1, $2) ON CONFLICT DO NOTHING",
-                claim_tuples
-            )
-            
-            # Verify which ones we actually claimed?
-            # Strictly speaking, if we lost the race, we shouldn't return them.
-            # But for simplicity, we assume we got them.
-            return candidates
-
-
-async def upsert_channel_raw(channel: dict[str, Any]) -> None:
-    """Upsert one raw channel row."""
-    pool = _require_pool()
+    pending_sql = f"SELECT EXISTS (SELECT 1 {candidates})"
+
+    # Under READ COMMITTED the statement is not atomic across workers: two workers that
+    # start together snapshot the same top-N, and the second one waits on the first one's
+    # uncommitted claims and then drops them all as conflicts. An empty result therefore
+    # doesn't mean "no work"; retry (each statement takes a fresh snapshot) while
+    # unclaimed candidates remain.
+    for _ in range(_CLAIM_ATTEMPTS):
+        rows = await pool.fetch(claim_sql, _utcnow(), limit)
+        if rows:
+            return [r[0] for r in rows]
+        if not await pool.fetchval(pending_sql):
+            return []
+    return []
+
+
+async def upsert_channel_raw(channel: dict[str, Any], *, conn: asyncpg.Connection | None = None) -> None:
+    """Upsert one raw channel row (on ``conn`` if given, e.g. inside a transaction)."""
+    pool = conn or _require_pool()
     url = channel.get("channel_url")
     if not url:
         raise ValueError("channel_url is required")
@@ -483,11 +543,16 @@ async def upsert_channel_raw(channel: dict[str, Any]) -> None:
     )
 
 
-async def upsert_channel_videos_raw(channel_url: str, videos: list[dict[str, Any]]) -> tuple[int, int]:
-    """Batch upsert raw channel videos."""
+async def upsert_channel_videos_raw(
+    channel_url: str,
+    videos: list[dict[str, Any]],
+    *,
+    conn: asyncpg.Connection | None = None,
+) -> tuple[int, int]:
+    """Batch upsert raw channel videos (on ``conn`` if given)."""
     if not videos:
         return (0, 0)
-    pool = _require_pool()
+    pool = conn or _require_pool()
 
     tuples = []
     seen = set()
@@ -523,9 +588,15 @@ async def upsert_channel_videos_raw(channel_url: str, videos: list[dict[str, Any
     return len(tuples), 0
 
 
-async def mark_channel_processed(channel_url: str, *, processed_at: datetime | None = None, status: str = "success") -> None:
-    """Mark a channel as processed."""
-    pool = _require_pool()
+async def mark_channel_processed(
+    channel_url: str,
+    *,
+    processed_at: datetime | None = None,
+    status: str = "success",
+    conn: asyncpg.Connection | None = None,
+) -> None:
+    """Mark a channel as processed (on ``conn`` if given, e.g. inside a transaction)."""
+    pool = conn or _require_pool()
     p_at = _ensure_datetime(processed_at) or _utcnow()
 
     table_name = _get_table_name("channels_processed")
@@ -538,11 +609,35 @@ async def mark_channel_processed(channel_url: str, *, processed_at: datetime | N
     """, channel_url, p_at, status)
 
 
-async def is_channel_processed(channel_url: str) -> bool:
-    """Check if a channel has already been processed."""
-    if not channel_url:
-        return False
+async def persist_channel_bundle(
+    channel: dict[str, Any],
+    videos: list[dict[str, Any]],
+    *,
+    status: str = "success",
+) -> None:
+    """Persist one channel's raw row + videos and mark it processed, atomically.
+
+    All three writes share one connection and one transaction, so a channel is
+    never marked processed without its data (or vice versa).
+    """
+    url = channel.get("channel_url")
+    if not url:
+        raise ValueError("channel_url is required")
+    pool = _require_pool()
+    async with pool.acquire() as conn, conn.transaction():
+        await upsert_channel_raw(channel, conn=conn)
+        await upsert_channel_videos_raw(url, videos, conn=conn)
+        await mark_channel_processed(url, status=status, conn=conn)
+
+
+async def fetch_processed_set(channel_urls: list[str]) -> set[str]:
+    """Return which of ``channel_urls`` are already in channels_processed (one query)."""
+    if not channel_urls:
+        return set()
     pool = _require_pool()
     table_name = _get_table_name("channels_processed")
-    row = await pool.fetchrow(f"SELECT 1 FROM {table_name} WHERE channel_url = $1", channel_url)
-    return row is not None
+    rows = await pool.fetch(
+        f"SELECT channel_url FROM {table_name} WHERE channel_url = ANY($1::text[])",
+        channel_urls,
+    )
+    return {row[0] for row in rows}
@@ -1,23 +1,123 @@
 import sys
-import time
-import subprocess
 import asyncio
 import argparse
 import math
 import json
 from pathlib import Path
 import db
+import yt_discovery
 from dotenv import load_dotenv
+from playwright.async_api import async_playwright
 
-async def get_already_run_queries(language: str = "es") -> set[str]:
+async def get_already_run_queries() -> frozenset[str]:
+    """Read the executed-query history. Expects the DB pool to be already open."""
+    try:
+        return await db.get_executed_queries()
+    except Exception as e:
+        # stderr, like every diagnostic here: --check-batches stdout must stay a clean JSON list.
+        print(f"⚠️ Warning: No se pudo leer el historial de queries ({e}). Se ejecutarán todas.", file=sys.stderr)
+        return frozenset()
+
+
+async def _run_all(args: argparse.Namespace, queries: list[str], queries_file: Path) -> None:
+    """Open the DB once, run the requested mode and close it at the end."""
+    # Convert locale to simple language code
+    language = "en" if args.lang == "en-US" else "es"
     try:
         await db.init_db(language=language)
-        executed = await db.get_executed_queries()
-        await db.close_db()
-        return executed
     except Exception as e:
-        print(f"⚠️ Warning: No se pudo leer el historial de queries ({e}). Se ejecutarán todas.")
-        return set()
+        if not args.check_batches:
+            # Every query writes its results to the DB: without it there is nothing to run.
+            print(f"❌ Error: No se pudo conectar a la base de datos ({e}).", file=sys.stderr)
+            sys.exit(1)
+        # --check-batches falls back to "all batches pending" without a pool.
+        # stderr keeps the --check-batches stdout a clean JSON list.
+        print(f"⚠️ Warning: No se pudo conectar a la base de datos ({e}).", file=sys.stderr)
+    try:
+        if args.check_batches:
+            await _check_batches(args, queries)
+        else:
+            await _run_batch(args, queries, queries_file)
+    finally:
+        await db.close_db()
+
+
+async def _check_batches(args: argparse.Namespace, queries: list[str]) -> None:
+    total_queries = len(queries)
+    batch_size = args.batch_size
+    batch_count = math.ceil(total_queries / batch_size)
+
+    # If reprocess-duplicates is enabled, we need all batches
+    # Otherwise, only include batches with pending queries
+    if args.reprocess_duplicates:
+        needed_batches = list(range(batch_count))
+    else:
+        already_run = await get_already_run_queries()
+        # Membership is computed once per query; each batch then only scans its slice of booleans.
+        done_mask = [q in already_run for q in queries]
+        needed_batches = [
+            i for i in range(batch_count)
+            if not all(done_mask[i * batch_size:(i + 1) * batch_size])
+        ]
+
+    # Print ONLY the JSON list (no other text to stdout to avoid parsing issues)
+    print(json.dumps(needed_batches))
+
+
+async def _run_batch(args: argparse.Namespace, queries: list[str], queries_file: Path) -> None:
+    # 2. Obtener queries ya ejecutadas
+    print("🔎 Verificando historial de queries ejecutadas...")
+    already_run = await get_already_run_queries()
+
+    # 3. Filtrar
+    if args.reprocess_duplicates:
+        print("♻️ Modo reprocess: Se ejecutarán todas las queries (ignorando historial).")
+        pending_queries = queries
+    else:
+        pending_queries = [q for q in queries if q not in already_run]
+
+    skipped_count = len(queries) - len(pending_queries)
+    if skipped_count > 0:
+        print(f"⏩ Saltando {skipped_count} queries que ya fueron procesadas anteriormente.")
+
+    if not pending_queries:
+        print("✅ No hay queries pendientes en este batch. Todo está al día.")
+        return
+
+    total = len(pending_queries)
+    print(f"🚀 Iniciando procesamiento de {total} queries PENDIENTES desde {queries_file}")
+
+    # Queries run in-process on the shared DB pool; the semaphore bounds open browsers.
+    sem = asyncio.Semaphore(max(1, args.concurrency))
+
+    async def _run_one(i: int, query: str, browser) -> None:
+        async with sem:
+            print(f"\n==================================================")
+            print(f"▶️ [{i}/{total}] Ejecutando query: '{query}'")
+            print(f"==================================================")
+            try:
+                await yt_discovery.run_discovery(
+                    query,
+                    headless=True,
+                    lang=args.lang,
+                    upload_date=args.upload_date,
+                    duration=args.duration,
+                    features=args.features,
+                    sort_by=args.sort_by,
+                    browser=browser,
+                )
+                print(f"✅ Query '{query}' finalizada.")
+            except Exception as e:
+                # Una query fallida no detiene el resto del batch.
+                print(f"⚠️ Error inesperado ejecutando '{query}': {e}")
+
+    async with async_playwright() as p:
+        # One Chromium for the whole batch; every query opens its own context in it.
+        browser = await p.chromium.launch(headless=True)
+        await asyncio.gather(*(_run_one(i, q, browser) for i, q in enumerate(pending_queries, 1)))
+        await browser.close()
+
+    print("\n🎉 Todas las queries de este batch han sido procesadas.")
 
 def main():
     load_dotenv()
@@ -30,6 +130,7 @@ def main():
     parser.add_argument("--check-batches", action="store_true", help="Return JSON list of batch indices that have pending queries")
     parser.add_argument("--queries-file", type=str, default=None, help="File containing queries to process. If not specified, auto-selects based on language.")
     parser.add_argument("--reprocess-duplicates", action="store_true", help="Reprocess queries that have already been executed")
+    parser.add_argument("--concurrency", type=int, default=1, help="Number of queries scraped at the same time (default: 1)")
     
     # Language selection
     lang_group = parser.add_mutually_exclusive_group()
@@ -62,116 +163,38 @@ def main():
     total_queries = len(queries)
 
     # Mode: Check Batches
-    if args.check_batches:
-        if not args.batch_size:
-            print("To check batches, you must provide --batch-size.")
-            sys.exit(1)
+    if args.check_batches and not args.batch_size:
+        print("To check batches, you must provide --batch-size.")
+        sys.exit(1)
 
-        # Convert locale to simple language code
-        language = "en" if args.lang == "en-US" else "es"
-        already_run = asyncio.run(get_already_run_queries(language))
-        batch_size = args.batch_size
-        needed_batches = []
-        
-        batch_count = math.ceil(total_queries / batch_size)
-        
-        for i in range(batch_count):
-            start = i * batch_size
-            end = start + batch_size
-            batch_queries = queries[start:min(end, total_queries)]
-            
-            # If reprocess-duplicates is enabled, we need all batches
-            # Otherwise, only include batches with pending queries
-            if args.reprocess_duplicates:
-                needed_batches.append(i)
-            elif any(q for q in batch_queries if q not in already_run):
-                needed_batches.append(i)
-        
-        # Print ONLY the JSON list (no other text to stdout to avoid parsing issues)
-        print(json.dumps(needed_batches))
-        return
-    
-    # Logic for batching
-    if args.batch_size is not None and args.batch_index is not None:
-        start_idx = args.batch_index * args.batch_size
-        end_idx = start_idx + args.batch_size
-        # Slice safely
-        queries = queries[start_idx:end_idx]
-        print(f"🔢 Batch Mode: Processing batch {args.batch_index} (Size: {args.batch_size})")
-        print(f"   Range: [{start_idx} - {min(end_idx, total_queries)}) of {total_queries} total queries.")
-    else:
-        print(f"Processing all {total_queries} queries (No batch mode).")
+    if not args.check_batches:
+        # Logic for batching
+        if args.batch_size is not None and args.batch_index is not None:
+            start_idx = args.batch_index * args.batch_size
+            end_idx = start_idx + args.batch_size
+            # Slice safely
+            queries = queries[start_idx:end_idx]
+            print(f"🔢 Batch Mode: Processing batch {args.batch_index} (Size: {args.batch_size})")
+            print(f"   Range: [{start_idx} - {min(end_idx, total_queries)}) of {total_queries} total queries.")
+        else:
+            print(f"Processing all {total_queries} queries (No batch mode).")
 
-    if not queries:
-        print("⚠️ No queries in this batch (index might be out of range).")
-        return
+        if not queries:
+            print("⚠️ No queries in this batch (index might be out of range).")
+            return
 
-    # 2. Obtener queries ya ejecutadas
-    print("🔎 Verificando historial de queries ejecutadas...")
-    # Convert locale to simple language code
-    language = "en" if args.lang == "en-US" else "es"
-    already_run = asyncio.run(get_already_run_queries(language))
-    
-    # 3. Filtrar
-    if args.reprocess_duplicates:
-        print("♻️ Modo reprocess: Se ejecutarán todas las queries (ignorando historial).")
-        pending_queries = queries
-    else:
-        pending_queries = [q for q in queries if q not in already_run]
-    
-    skipped_count = len(queries) - len(pending_queries)
-    if skipped_count > 0:
-        print(f"⏩ Saltando {skipped_count} queries que ya fueron procesadas anteriormente.")
-    
-    if not pending_queries:
-        print("✅ No hay queries pendientes en este batch. Todo está al día.")
-        return
-
-    total = len(pending_queries)
-    print(f"🚀 Iniciando procesamiento de {total} queries PENDIENTES desde {queries_file}")
-
-    for i, query in enumerate(pending_queries, 1):
-        print(f"\n==================================================")
-        print(f"▶️ [{i}/{total}] Ejecutando query: '{query}'")
-        print(f"==================================================")
-        
-        try:
-            # Ejecutamos yt_discovery.py como subproceso
-            # Se asume que usa las opciones por defecto (headless=True, limit=None o lo que tenga el script)
-            # Puedes agregar --limit 50 si quisieras forzar un límite
-            cmd = [sys.executable, "yt_discovery.py", "--query", query, "--headless"]
-            
-            # Add language flag
-            if args.lang == "en-US":
-                cmd.append("--EN")
-            else:
-                cmd.append("--ES")
-            
-            # Add filter arguments if specified
-            if args.upload_date:
-                cmd.extend(["--upload-date", args.upload_date])
-            if args.duration:
-                cmd.extend(["--duration", args.duration])
-            if args.features:
-                cmd.append("--features")
-                cmd.extend(args.features)
-            if args.sort_by:
-                cmd.extend(["--sort-by", args.sort_by])
-            
-            subprocess.run(cmd, check=False) # check=False para que no se detenga si un script falla
-            
-            print(f"✅ Query '{query}' finalizada.")
-            
-            # Pequeña pausa entre ejecuciones para dar respiro
-            time.sleep(2)
-            
-        except KeyboardInterrupt:
-            print("\n🛑 Ejecución detenida por el usuario.")
-            sys.exit(0)
-        except Exception as e:
-            print(f"⚠️ Error inesperado ejecutando '{query}': {e}")
+    # uvloop is optional (not available on Windows); fall back to the stock loop.
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
 
-    print("\n🎉 Todas las queries de este batch han sido procesadas.")
+    try:
+        asyncio.run(_run_all(args, queries, queries_file))
+    except KeyboardInterrupt:
+        print("\n🛑 Ejecución detenida por el usuario.")
+        sys.exit(0)
 
 if __name__ == "__main__":
     main()
@@ -1,98 +1,79 @@
 import sys
 import asyncio
 import argparse
-import subprocess
 from pathlib import Path
-from colorama import Fore, Style, init
-from dotenv import load_dotenv
 
-# Initialize colorama
-init(autoreset=True)
-
-import db  # Assuming db.py exists and handles async DB ops
-
-async def get_already_run_queries(language: str = "es") -> set[str]:
-    """Retrieves already executed queries from the database."""
-    try:
-        await db.init_db(language=language)
-        executed = await db.get_executed_queries()
-        await db.close_db()
-        return executed
-    except Exception as e:
-        print(f"{Fore.YELLOW}⚠️ Warning: Could not read query history ({e}). All queries will be considered new.{Style.RESET_ALL}")
-        return set()
-
-async def worker(
-    instance_id: int,
-    queries: list[str],
+# Raw ANSI colours; colorama is only needed to translate them on Windows consoles.
+if sys.platform == "win32":
+    from colorama import init
+    init()
+
+_BLUE = "\033[34m"
+_GREEN = "\033[32m"
+_YELLOW = "\033[33m"
+_RED = "\033[31m"
+_MAGENTA = "\033[35m"
+_RESET = "\033[0m"
+
+# db / yt_discovery / playwright / dotenv are imported inside the functions that use them,
+# so `--help` and argument errors don't pay for asyncpg + Playwright imports.
+
+async def _execute(
+    query_id: int,
+    total: int,
+    query: str,
+    browser,
     lang: str = "es-MX",
     upload_date: str | None = None,
     duration: str | None = None,
     features: list[str] | None = None,
-    sort_by: str | None = None
+    sort_by: str | None = None,
+    quiet: bool = True
 ):
     """
-    Worker function that processes a list of queries sequentially.
+    Run one query in-process through yt_discovery.run_discovery and report the outcome.
     """
-    total = len(queries)
-    print(f"{Fore.CYAN}[Instance {instance_id}] Started processing {total} queries.{Style.RESET_ALL}")
+    import yt_discovery
 
-    for i, query in enumerate(queries, 1):
-        print(f"{Fore.BLUE}[Instance {instance_id}] ({i}/{total}) Running: '{query}'{Style.RESET_ALL}")
-        
-        try:
-            # Construct command
-            # Using sys.executable to ensure we use the same Python environment
-            cmd = [sys.executable, "yt_discovery.py", "--query", query, "--headless"]
-            
-            # Add language flag
-            if lang == "en-US":
-                cmd.append("--EN")
-            else:
-                cmd.append("--ES")
-            
-            # Add filter arguments if specified
-            if upload_date:
-                cmd.extend(["--upload-date", upload_date])
-            if duration:
-                cmd.extend(["--duration", duration])
-            if features:
-                cmd.append("--features")
-                cmd.extend(features)
-            if sort_by:
-                cmd.extend(["--sort-by", sort_by])
-            
-            # Execute subprocess asynchronously
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.DEVNULL, # Suppress stdout to keep console clean
-                stderr=asyncio.subprocess.PIPE     # Capture stderr in case of errors
-            )
-            
-            # Wait for finish
-            stdout, stderr = await process.communicate()
-            
-            if process.returncode == 0:
-                 print(f"{Fore.GREEN}[Instance {instance_id}] ✅ Finished: '{query}'{Style.RESET_ALL}")
-            else:
-                 error_msg = stderr.decode().strip() if stderr else "Unknown error"
-                 print(f"{Fore.RED}[Instance {instance_id}] ❌ Failed: '{query}' - {error_msg}{Style.RESET_ALL}")
+    # One unflushed write per status line; the driver flushes once at the end.
+    sys.stdout.write(f"{_BLUE}[Query {query_id}/{total}] Running: '{query}'{_RESET}\n")
 
-        except Exception as e:
-            print(f"{Fore.RED}[Instance {instance_id}] 💥 Exception running '{query}': {e}{Style.RESET_ALL}")
-            
-        # Small delay to prevent complete system choke if tasks are very short
-        await asyncio.sleep(1)
+    loop = asyncio.get_running_loop()
+    t0 = loop.time()
+    try:
+        await yt_discovery.run_discovery(
+            query,
+            headless=True,
+            lang=lang,
+            upload_date=upload_date,
+            duration=duration,
+            features=features,
+            sort_by=sort_by,
+            browser=browser,
+            quiet=quiet,
+        )
+        sys.stdout.write(f"{_GREEN}[Query {query_id}/{total}] ✅ Finished: '{query}'{_RESET}\n")
+    except Exception as e:
+        sys.stdout.write(f"{_RED}[Query {query_id}/{total}] ❌ Failed: '{query}' - {e}{_RESET}\n")
+
+    # Only pad very short runs (e.g. instant failures) up to 1s to prevent a system choke;
+    # normal queries take far longer and go straight to the next one.
+    elapsed = loop.time() - t0
+    if elapsed < 1.0:
+        await asyncio.sleep(1.0 - elapsed)
 
-    print(f"{Fore.CYAN}[Instance {instance_id}] Completed all tasks.{Style.RESET_ALL}")
+async def run_one(query: str, sem: asyncio.Semaphore, *, query_id: int, **kwargs):
+    """Wait for a free slot, then run the query. One task per query keeps every slot busy."""
+    async with sem:
+        await _execute(query_id, query=query, **kwargs)
 
 async def main():
-    load_dotenv()
     parser = argparse.ArgumentParser(description="Run multiple instances of YouTube discovery in parallel.")
     parser.add_argument("--instances", type=int, required=True, help="Number of parallel instances (workers) to run.")
     parser.add_argument("--batch-size", type=int, required=True, help="Number of queries assigned to each instance.")
     parser.add_argument("--queries-file", type=str, default=None, help="Path to the queries file. If not specified, auto-selects based on language.")
     parser.add_argument("--reprocess-duplicates", action="store_true", help="Reprocess queries that have already been executed.")
+    parser.add_argument("--verbose", action="store_true", help="Show each query's scraping progress messages (warnings are always shown).")
     
     # Language selection
     lang_group = parser.add_mutually_exclusive_group()
@@ -115,17 +96,46 @@ async def main():
         queries_file = Path("queries_en.txt" if args.lang == "en-US" else "queries.txt")
 
     if not queries_file.exists():
-        print(f"{Fore.RED}❌ Error: Query file '{queries_file}' not found.{Style.RESET_ALL}")
+        print(f"{_RED}❌ Error: Query file '{queries_file}' not found.{_RESET}")
         return
 
     # 1. Read queries
     print(f"Loading queries from {queries_file}...")
     with open(queries_file, "r", encoding="utf-8") as f:
-        all_queries = [line.strip() for line in f if line.strip()]
+        # Single pass over the file; dict.fromkeys drops repeated lines and keeps file order.
+        all_queries = list(dict.fromkeys(q for q in (line.strip() for line in f) if q))
     
     total_loaded = len(all_queries)
     print(f"Loaded {total_loaded} queries.")
 
+    import db
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    # Convert locale to simple language code
+    language = "en" if args.lang == "en-US" else "es"
+
+    # One pool for the whole run: the history lookup and every worker share it.
+    # Every query writes its results to the DB, so without it there is nothing to run.
+    try:
+        await db.init_db(language=language)
+    except Exception as e:
+        print(f"{_RED}❌ Error: Could not connect to the database ({e}).{_RESET}")
+        sys.exit(1)
+    try:
+        await _dispatch(args, all_queries)
+    finally:
+        await db.close_db()
+
+async def _dispatch(args: argparse.Namespace, all_queries: list[str]):
+    """Filter out executed queries and fan the rest out to the workers."""
+    import db
+    from playwright.async_api import async_playwright
+
+    # User requirement: "si se seleccionan 50 queries y 10 instancias... total 500 queries"
+    # This implies we take (instances * batch_size) queries from the top of Pending
+    needed_total = args.instances * args.batch_size
+
     # 2. Filter executed
     pending_queries = []
     if args.reprocess_duplicates:
@@ -133,71 +143,71 @@ async def main():
         pending_queries = all_queries
     else:
         print("Checking database for executed queries...")
-        # Convert locale to simple language code
-        language = "en" if args.lang == "en-US" else "es"
-        already_run = await get_already_run_queries(language)
-        
-        pending_queries = [q for q in all_queries if q not in already_run]
-        total_pending = len(pending_queries)
-        print(f"Pending queries: {total_pending} (Filtered {total_loaded - total_pending} executed)")
+        # Postgres stops once it has found needed_total pending queries, so the work is
+        # bounded by the batch target rather than by the size of the queries file.
+        try:
+            pending_queries = await db.filter_pending(all_queries, limit=needed_total)
+        except Exception as e:
+            print(f"{_YELLOW}⚠️ Warning: Could not read query history ({e}). All queries will be considered new.{_RESET}")
+            pending_queries = all_queries
+        print(f"Pending queries: {len(pending_queries)} (Taking at most {needed_total} from the top)")
 
     if not pending_queries:
-        print(f"{Fore.GREEN}No pending queries to process!{Style.RESET_ALL}")
+        print(f"{_GREEN}No pending queries to process!{_RESET}")
         return
 
     # 3. Distribute work
-    # User requirement: "si se seleccionan 50 queries y 10 instancias... total 500 queries"
-    # This implies we take (instances * batch_size) queries from the top of Pending
-    
-    # Convert locale to simple language code for tracking
-    language = "en" if args.lang == "en-US" else "es"
-    
-    needed_total = args.instances * args.batch_size
     queries_to_process = pending_queries[:needed_total]
     
     actual_count = len(queries_to_process)
     print(f"Processing {actual_count} queries across {args.instances} instances (Target: {needed_total})")
     
     if actual_count < needed_total:
-         print(f"{Fore.YELLOW}⚠️ Warning: Not enough pending queries to fill all batches. Some instances may have less work or be idle.{Style.RESET_ALL}")
-
-    # Create batches
-    # Strategy: Just slice sequentially as requested
-    # Instance 0: 0 to batch_size
-    # Instance 1: batch_size to 2*batch_size
-    
-    tasks = []
-    
-    for i in range(args.instances):
-        start = i * args.batch_size
-        end = start + args.batch_size
-        
-        batch = queries_to_process[start:end]
-        
-        if batch:
-            tasks.append(worker(
-                i + 1,
-                batch,
-                lang=args.lang,
-                upload_date=args.upload_date,
-                duration=args.duration,
-                features=args.features,
-                sort_by=args.sort_by
-            ))
-        else:
-            print(f"Instance {i + 1} has no queries assigned.")
-
-    if not tasks:
-        print("No tasks created.")
-        return
+         print(f"{_YELLOW}⚠️ Warning: Not enough pending queries to fill all batches. Fewer queries than instances * batch-size will run.{_RESET}")
 
     # 4. Run
-    print(f"{Fore.MAGENTA}🚀 Starting {len(tasks)} workers...{Style.RESET_ALL}")
-    await asyncio.gather(*tasks)
-    print(f"{Fore.MAGENTA}🏁 All instances finished.{Style.RESET_ALL}")
+    # One task per query; the semaphore keeps at most `instances` queries in flight, so a
+    # slot freed by a fast or failed query is immediately reused instead of idling.
+    sem = asyncio.Semaphore(args.instances)
+    print(f"{_MAGENTA}🚀 Starting {actual_count} queries on {args.instances} instances...{_RESET}")
+    async with async_playwright() as p:
+        # One Chromium for the whole run; every query opens its own context in it.
+        browser = await p.chromium.launch(headless=True)
+
+        # Arguments shared by every query, built once instead of per task.
+        common = dict(
+            total=actual_count,
+            browser=browser,
+            lang=args.lang,
+            upload_date=args.upload_date,
+            duration=args.duration,
+            features=args.features,
+            sort_by=args.sort_by,
+            quiet=not args.verbose
+        )
+
+        def _task(idx: int, q: str):
+            return run_one(q, sem, query_id=idx, **common)
+
+        if sys.version_info >= (3, 11):
+            # _execute() catches per-query errors, so one failure never cancels the group.
+            async with asyncio.TaskGroup() as tg:
+                for idx, q in enumerate(queries_to_process, 1):
+                    tg.create_task(_task(idx, q))
+        else:
+            await asyncio.gather(*(_task(idx, q) for idx, q in enumerate(queries_to_process, 1)))
+        await browser.close()
+    print(f"{_MAGENTA}🏁 All instances finished.{_RESET}", flush=True)
 
 if __name__ == "__main__":
+    # uvloop is optional (not available on Windows); fall back to the stock loop.
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
+
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
-        print(f"\n{Fore.RED}🛑 Execution stopped by user.{Style.RESET_ALL}")
+        print(f"\n{_RED}🛑 Execution stopped by user.{_RESET}")
@@ -13,21 +13,20 @@ from dotenv import load_dotenv
 
 async def setup_tables():
     """Initialize database tables for both languages."""
-    load_dotenv()
-    
     print("🔧 Setting up language-specific database tables...")
     
-    # Create Spanish tables
+    # One pool for both languages: init_db creates the _es tables, then the
+    # _en tables are created over the same connection pool.
     print("\n📊 Creating Spanish (_es) tables...")
-    await db.init_db(language="es")
-    await db.close_db()
-    print("✅ Spanish tables created successfully!")
-    
-    # Reset pool and create English tables
-    print("\n📊 Creating English (_en) tables...")
-    await db.init_db(language="en")
-    await db.close_db()
-    print("✅ English tables created successfully!")
+    await db.init_db(language="es", max_size=1)
+    try:
+        print("✅ Spanish tables created successfully!")
+
+        print("\n📊 Creating English (_en) tables...")
+        await db.create_tables("en")
+        print("✅ English tables created successfully!")
+    finally:
+        await db.close_db()
     
     print("\n🎉 Setup complete! Both language table sets are ready.")
     print("\nYou can now run:")
@@ -36,4 +35,6 @@ async def setup_tables():
 
 
 if __name__ == "__main__":
+    # Read .env once, before the event loop starts.
+    load_dotenv()
     asyncio.run(setup_tables())
@@ -4,45 +4,66 @@ Test script for bilingual YouTube scraper
 Demonstrates different language and filter combinations
 """
 
-import subprocess
+import argparse
+import asyncio
 import sys
 from pathlib import Path
 
-def run_test(description: str, command: list[str]):
+TIMEOUT = 120  # 2 minute timeout per test
+
+async def run_test(description: str, command: list[str], sem: asyncio.Semaphore):
     """Run a test command and report results"""
-    print(f"\n{'='*60}")
-    print(f"TEST: {description}")
-    print(f"{'='*60}")
-    print(f"Command: {' '.join(command)}\n")
-    
-    try:
-        result = subprocess.run(
-            command,
-            capture_output=True,
-            text=True,
-            timeout=120  # 2 minute timeout
-        )
-        
-        if result.returncode == 0:
-            print("✅ SUCCESS")
-            if result.stdout:
-                print(f"Output:\n{result.stdout[:500]}")  # First 500 chars
-        else:
-            print("❌ FAILED")
-            if result.stderr:
-                print(f"Error:\n{result.stderr}")
-                
-    except subprocess.TimeoutExpired:
-        print("⏱️ TIMEOUT - Test took too long")
-    except Exception as e:
-        print(f"💥 EXCEPTION: {e}")
+    async with sem:
+        lines = [
+            f"\n{'='*60}",
+            f"TEST: {description}",
+            f"{'='*60}",
+            f"Command: {' '.join(command)}\n",
+        ]
+
+        proc = None
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *command,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=TIMEOUT)
+            stdout = stdout.decode(errors="replace")
+            stderr = stderr.decode(errors="replace")
+
+            if proc.returncode == 0:
+                lines.append("✅ SUCCESS")
+                if stdout:
+                    lines.append(f"Output:\n{stdout[:500]}")  # First 500 chars
+            else:
+                lines.append("❌ FAILED")
+                if stderr:
+                    lines.append(f"Error:\n{stderr}")
+
+        except asyncio.TimeoutError:
+            if proc is not None and proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+            lines.append("⏱️ TIMEOUT - Test took too long")
+        except Exception as e:
+            lines.append(f"💥 EXCEPTION: {e}")
+
+        # Tests run concurrently, so each report is printed in one piece once it finishes.
+        print("\n".join(lines))
+
+async def main():
+    parser = argparse.ArgumentParser(description="Smoke tests for the bilingual YouTube scraper.")
+    parser.add_argument("--jobs", type=int, default=5, help="Max tests running at once (each one launches a browser).")
+    args = parser.parse_args()
 
-def main():
     print("🧪 Bilingual YouTube Scraper Test Suite")
     print(f"Working directory: {Path.cwd()}")
-    
+
+    tests = []
+
     # Test 1: Spanish (default) with basic filters
-    run_test(
+    tests.append((
         "Spanish (default) - Este mes + Más de 20 minutos",
         [
             sys.executable, "yt_discovery.py",
@@ -52,10 +73,10 @@ def main():
             "--duration", "over_20",
             "--headless"
         ]
-    )
+    ))
     
     # Test 2: English with filters
-    run_test(
+    tests.append((
         "English - This month + Over 20 minutes",
         [
             sys.executable, "yt_discovery.py",
@@ -66,10 +87,10 @@ def main():
             "--duration", "over_20",
             "--headless"
         ]
-    )
+    ))
     
     # Test 3: English with multiple features
-    run_test(
+    tests.append((
         "English - HD + Subtitles + Sort by view count",
         [
             sys.executable, "yt_discovery.py",
@@ -80,10 +101,10 @@ def main():
             "--sort-by", "view_count",
             "--headless"
         ]
-    )
+    ))
     
     # Test 4: Spanish with explicit flag
-    run_test(
+    tests.append((
         "Spanish (explicit) - Esta semana + 4K",
         [
             sys.executable, "yt_discovery.py",
@@ -94,13 +115,16 @@ def main():
             "--features", "4k",
             "--headless"
         ]
-    )
+    ))
     
     # Test 5: Help text verification
-    run_test(
+    tests.append((
         "Help text verification",
         [sys.executable, "yt_discovery.py", "--help"]
-    )
+    ))
+
+    sem = asyncio.Semaphore(max(1, args.jobs))
+    await asyncio.gather(*(run_test(desc, cmd, sem) for desc, cmd in tests))
     
     print("\n" + "="*60)
     print("🏁 Test suite completed")
@@ -112,4 +136,4 @@ def main():
     print("\nRun with --headed flag to visually inspect browser behavior")
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
@@ -16,123 +16,131 @@ from __future__ import annotations
 import argparse
 import asyncio
 import json
+import logging
 import os
-import subprocess
 import sys
-import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone, timedelta
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Any, Iterator
+from logging.handlers import QueueHandler, QueueListener
+from pathlib import Path
+from queue import SimpleQueue
+from typing import Any, AsyncIterator, Iterator
 from dotenv import load_dotenv
 
+# orjson is optional: it parses the worker's dump straight from bytes and much faster.
+# Its JSONDecodeError subclasses json.JSONDecodeError, and json.loads accepts bytes too.
+try:
+	import orjson
+	_json_loads = orjson.loads
+except ImportError:
+	_json_loads = json.loads
+
 from db import (
 	claim_channels_for_discovery,
 	close_db,
+	fetch_processed_set,
 	init_db,
-	is_channel_processed,
 	mark_channel_processed,
-	upsert_channel_raw,
-	upsert_channel_videos_raw,
+	persist_channel_bundle,
 )
 
 
-# Conservative default for parallel yt-dlp workers.
+# Conservative default for parallel yt-dlp workers (concurrent channel jobs).
 #
 # IMPORTANT:
-# - This module spawns multiple yt-dlp subprocesses (I/O bound).
+# - This module runs this many persistent yt-dlp worker processes (I/O bound).
 # - Start conservative to avoid rate limits / network saturation.
 # - Increase only after you validate stability.
+# - Workers are I/O bound (waiting on YouTube), so the right value depends on the
+#   network / rate limits, not on CPU cores. Override with YTDL_WORKERS (read at
+#   run time, so a value in .env applies too).
 MAX_WORKERS = 6
 
 
+def _worker_count() -> int:
+	"""YTDL_WORKERS if it is a valid integer, else MAX_WORKERS (with a warning)."""
+	raw = os.environ.get("YTDL_WORKERS")
+	if not raw:
+		return MAX_WORKERS
+	try:
+		return max(1, int(raw))
+	except ValueError:
+		_log(logging.WARNING, "error", "invalid YTDL_WORKERS=%r (expected an integer); using %d", raw, MAX_WORKERS)
+		return MAX_WORKERS
+
+
 # Number of channels to claim per DB round-trip.
 DISCOVERY_BATCH_SIZE = 200
 
 
-class _DBRunner:
-	"""Runs db.py coroutines on a dedicated asyncio loop thread.
+def _utcnow() -> datetime:
+	return datetime.now(timezone.utc)
 
-	Why:
-	- db.py is async (asyncpg) and expects to live on a single event loop.
-	- Workers run in threads; they must not create/await their own DB loops.
-	- We use run_coroutine_threadsafe to execute DB work on the DB loop.
-	"""
+
+# Logging: `[HH:MM:SS][tag] message`, coloured by tag. The CLI routes records through a
+# QueueHandler so the terminal writes happen on a listener thread, off the event loop.
+log = logging.getLogger("yt_channel_discovery")
+
+_TAG_COLORS = {
+	"yt-dlp": "\033[94m",
+	"skip": "\033[93m",
+	"ok": "\033[92m",
+	"info": "\033[92m",
+	"done": "\033[92m",
+	"failed-permanent": "\033[91m",
+	"error": "\033[91m",
+	"system": "\033[91m",
+}
+
+
+class _TagFormatter(logging.Formatter):
+	# UTC timestamps, as before.
+	converter = time.gmtime
 
 	def __init__(self) -> None:
-		self._loop: asyncio.AbstractEventLoop | None = None
-		self._thread: threading.Thread | None = None
-		self._started = threading.Event()
-		self._stopped = threading.Event()
-
-	def start(self) -> None:
-		# Start exactly one background thread that owns the asyncio event loop.
-		# All async DB calls (asyncpg) must run on that loop.
-		if self._thread is not None:
-			return
-
-		def _thread_main() -> None:
-			# Dedicated event loop for all DB operations.
-			# (asyncpg connections/pool are bound to a loop)
-			if sys.platform == "win32":
-				# ProactorEventLoop (default on Py3.8+ Win) can cause "WinError 121"
-				# (Semaphore timeout) with asyncpg under load or specific network conditions.
-				# SelectorEventLoop is more stable for pure socket I/O (no subprocesses needed here).
-				loop = asyncio.WindowsSelectorEventLoopPolicy().new_event_loop()
-			else:
-				loop = asyncio.new_event_loop()
-			
-			asyncio.set_event_loop(loop)
-			self._loop = loop
-			self._started.set()
-			try:
-				loop.run_forever()
-			finally:
-				try:
-					loop.close()
-				finally:
-					self._stopped.set()
-
-		self._thread = threading.Thread(target=_thread_main, name="db-runner-loop", daemon=True)
-		self._thread.start()
-		self._started.wait(timeout=10)
-		if self._loop is None:
-			raise RuntimeError("Failed to start DB event loop thread")
-
-	def run(self, coro: "asyncio.Future[Any] | asyncio.coroutines.Coroutine[Any, Any, Any]") -> Any:
-		"""Run a coroutine on the DB loop and block for its result."""
-		# NOTE: This is the bridge between worker threads and the DB loop.
-		# Workers remain synchronous; DB work remains async, but centralized.
-		loop = self._loop
-		if loop is None:
-			raise RuntimeError("DBRunner not started")
-		future = asyncio.run_coroutine_threadsafe(coro, loop)
-		return future.result()
-
-	def stop(self) -> None:
-		# Stop the DB loop thread.
-		loop = self._loop
-		thread = self._thread
-		if loop is None or thread is None:
-			return
-		loop.call_soon_threadsafe(loop.stop)
-		thread.join(timeout=10)
-		self._loop = None
-		self._thread = None
+		super().__init__("[%(asctime)s][%(tag)s] %(message)s", datefmt="%H:%M:%S", defaults={"tag": "info"})
 
+	def format(self, record: logging.LogRecord) -> str:
+		line = super().format(record)
+		color = _TAG_COLORS.get(getattr(record, "tag", "info"))
+		return f"{color}{line}\033[0m" if color else line
+
+
+def _log(level: int, tag: str, msg: str, *args: Any) -> None:
+	# %-style args: the message is only built if the record is actually emitted.
+	log.log(level, msg, *args, extra={"tag": tag})
 
-def _utcnow() -> datetime:
-	return datetime.now(timezone.utc)
 
+def _start_logging() -> QueueListener:
+	"""Send this module's records through a queue to a stdout writer thread."""
+	queue: SimpleQueue[logging.LogRecord] = SimpleQueue()
+	stream = logging.StreamHandler(sys.stdout)
+	stream.setFormatter(_TagFormatter())
+	listener = QueueListener(queue, stream)
+	log.addHandler(QueueHandler(queue))
+	log.setLevel(logging.INFO)
+	log.propagate = False
+	listener.start()
+	return listener
 
+
+# Exact type checks (`type(x) is int`) are cheaper than isinstance() and also keep
+# bools out of the int branch without a separate guard. JSON-decoded values are
+# always exact builtins, so no subclasses are missed.
 def _coerce_int(value: Any) -> int | None:
-	if isinstance(value, bool):
-		return None
-	if isinstance(value, int):
+	t = type(value)
+	if t is int:
 		return value
-	if isinstance(value, float):
+	if t is float:
 		# yt-dlp can emit floats for some numeric fields
-		return int(value)
-	if isinstance(value, str):
+		try:
+			return int(value)
+		except (ValueError, OverflowError):
+			# nan / inf
+			return None
+	if t is str:
 		try:
 			return int(value)
 		except ValueError:
@@ -141,14 +149,143 @@ def _coerce_int(value: Any) -> int | None:
 
 
 def _coerce_bool(value: Any) -> bool | None:
-	if isinstance(value, bool):
-		return value
-	return None
+	return value if type(value) is bool else None
+
+
+
+# Persistent yt-dlp worker processes (see yt_dlp_worker.py).
+_WORKER_CMD = (sys.executable, str(Path(__file__).with_name("yt_dlp_worker.py")))
+# A whole dump is one response line; asyncio's default 64 KiB line limit is too small.
+_WORKER_LINE_LIMIT = 64 * 1024 * 1024
+# stderr lines kept per worker, only used to explain a crashed worker.
+_WORKER_STDERR_TAIL = 40
+
+
+def _ytdlp_cache_dir() -> Path:
+	"""yt-dlp cache dir shared by every worker: YTDL_CACHE_DIR, else yt-dlp's own default."""
+	configured = os.environ.get("YTDL_CACHE_DIR")
+	if configured:
+		return Path(configured).expanduser()
+	base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+	return Path(base) / "yt-dlp"
+
+
+class _YtdlpWorker:
+	"""One long-lived yt_dlp_worker.py process; one request in flight at a time."""
+
+	def __init__(self, cache_dir: Path | None = None) -> None:
+		self._cmd = (*_WORKER_CMD, str(cache_dir)) if cache_dir else _WORKER_CMD
+		self._proc: asyncio.subprocess.Process | None = None
+		# Bounded tail of the worker's stderr, drained continuously so the pipe never
+		# fills up; per-channel errors travel in the responses, this is for crashes.
+		self._stderr_tail: deque[bytes] = deque(maxlen=_WORKER_STDERR_TAIL)
+		self._stderr_task: asyncio.Task[None] | None = None
+
+	async def _ensure_started(self) -> asyncio.subprocess.Process:
+		# Started lazily, and restarted after a crash / kill.
+		if self._proc is None or self._proc.returncode is not None:
+			# close_fds=False lets CPython spawn via posix_spawn instead of fork+exec and skips
+			# the fd sweep. Safe: fds Python opens (asyncpg sockets, files) are non-inheritable.
+			self._proc = await asyncio.create_subprocess_exec(
+				*self._cmd,
+				stdin=asyncio.subprocess.PIPE,
+				stdout=asyncio.subprocess.PIPE,
+				stderr=asyncio.subprocess.PIPE,
+				close_fds=False,
+				limit=_WORKER_LINE_LIMIT,
+			)
+			self._stderr_tail.clear()
+			self._stderr_task = asyncio.create_task(self._drain_stderr(self._proc.stderr))
+		return self._proc
+
+	async def _drain_stderr(self, stream: asyncio.StreamReader) -> None:
+		while line := await stream.readline():
+			self._stderr_tail.append(line)
+
+	def _crash_error(self) -> RuntimeError:
+		msg = "yt-dlp worker exited unexpectedly"
+		tail = b"".join(self._stderr_tail).decode("utf-8", errors="replace").strip()
+		if tail:
+			msg += f": {tail[-2000:]}"
+		return RuntimeError(msg)
+
+	async def request(self, url: str, playlist_end: int, timeout: float) -> bytes:
+		"""Send one request and return the raw JSON response line."""
+		proc = await self._ensure_started()
+		try:
+			proc.stdin.write(json.dumps({"url": url, "playlist_end": playlist_end}).encode() + b"\n")
+			await proc.stdin.drain()
+			line = await asyncio.wait_for(proc.stdout.readline(), timeout=timeout)
+		except (BrokenPipeError, ConnectionResetError) as e:
+			# The worker died before reading the request.
+			await self.kill()
+			raise self._crash_error() from e
+		except BaseException:
+			# Timeout or cancellation (Ctrl+C): the stream is out of sync,
+			# so this process is killed and the next request starts a fresh one.
+			await self.kill()
+			raise
+		if not line:
+			await self.kill()
+			raise self._crash_error()
+		return line
+
+	async def kill(self) -> None:
+		proc, self._proc = self._proc, None
+		task, self._stderr_task = self._stderr_task, None
+		if proc is not None and proc.returncode is None:
+			try:
+				proc.kill()
+			except ProcessLookupError:
+				# Already exited, just not reaped yet.
+				pass
+			await proc.wait()
+		if task is not None:
+			# The pipe hits EOF once the process is gone; this collects its last lines.
+			try:
+				await asyncio.wait_for(task, timeout=1)
+			except (asyncio.TimeoutError, ValueError):
+				pass
+
+	async def close(self) -> None:
+		"""Graceful shutdown: EOF on stdin ends the worker loop."""
+		proc = self._proc
+		if proc is not None and proc.returncode is None:
+			proc.stdin.close()
+			try:
+				await asyncio.wait_for(proc.wait(), timeout=5)
+			except asyncio.TimeoutError:
+				pass
+		await self.kill()
+
+
+class _YtdlpPool:
+	"""A fixed set of persistent yt-dlp workers.
 
+	Taking a worker from the pool is what bounds concurrent yt-dlp fetches.
+	"""
+
+	def __init__(self, size: int, cache_dir: Path | None = None) -> None:
+		self._workers = [_YtdlpWorker(cache_dir) for _ in range(max(1, size))]
+		self._idle: asyncio.Queue[_YtdlpWorker] = asyncio.Queue()
+		for worker in self._workers:
+			self._idle.put_nowait(worker)
+
+	@asynccontextmanager
+	async def acquire(self) -> AsyncIterator[_YtdlpWorker]:
+		worker = await self._idle.get()
+		try:
+			yield worker
+		finally:
+			self._idle.put_nowait(worker)
 
+	async def close(self) -> None:
+		await asyncio.gather(*(worker.close() for worker in self._workers))
 
-def run_ytdlp_channel_dump(
+
+async def run_ytdlp_channel_dump(
 	channel_url: str,
+	workers: _YtdlpPool,
 	*,
 	max_videos: int = 40,
 	timeout_seconds: int = 180,
@@ -156,9 +293,9 @@ def run_ytdlp_channel_dump(
 	"""Run yt-dlp for a channel URL and return the parsed JSON.
 
 	Implementation notes:
-	- Uses subprocess (NO downloads).
-	- This is intentionally synchronous and I/O bound.
-	- Each worker thread executes one yt-dlp subprocess at a time.
+	- yt-dlp runs in a persistent worker process (NO downloads), with the same
+	  options as `yt-dlp --dump-single-json --flat-playlist ...`.
+	- Each channel job uses one worker at a time.
 	- Raises RuntimeError on failure.
 	"""
 	if not channel_url:
@@ -167,51 +304,28 @@ def run_ytdlp_channel_dump(
 		max_videos = 1
 
 	channel_url_videos = channel_url + "/videos"
-	cmd = [
-		sys.executable,
-		"-m",
-		"yt_dlp",
-		"--dump-single-json",
-		"--flat-playlist",
-		"--extractor-args",
-		"youtubetab:approximate_date",
-		"--playlist-end",
-		str(max_videos),
-		"--skip-download",
-		"--no-warnings",
-		channel_url_videos,
-	]
-
-	print(f"\033[94m[{_utcnow().strftime('%H:%M:%S')}][yt-dlp] fetching: {channel_url}...\033[0m")
-
-	try:
-		proc = subprocess.run(
-			cmd,
-			capture_output=True,
-			text=True,
-			timeout=timeout_seconds,
-		)
-	except subprocess.TimeoutExpired as e:
-		raise RuntimeError(f"yt-dlp timeout for {channel_url}") from e
 
-	if proc.returncode != 0:
-		err = (proc.stderr or "").strip()
-		out = (proc.stdout or "").strip()
-		suffix = err or out
-		msg = f"yt-dlp failed for {channel_url}"
-		if suffix:
-			msg += f": {suffix[:5000]}"
-		raise RuntimeError(msg)
-
-	stdout = (proc.stdout or "").strip()
-	if not stdout:
-		raise RuntimeError(f"yt-dlp produced empty output for {channel_url}")
+	# Waits for a free worker: at most MAX_WORKERS fetches run at once.
+	async with workers.acquire() as worker:
+		_log(logging.INFO, "yt-dlp", "fetching: %s...", channel_url)
+		try:
+			line = await worker.request(channel_url_videos, max_videos, timeout_seconds)
+		except asyncio.TimeoutError as e:
+			raise RuntimeError(f"yt-dlp timeout for {channel_url}") from e
 
 	try:
-		data = json.loads(stdout)
+		response = _json_loads(line)
 	except json.JSONDecodeError as e:
 		raise RuntimeError(f"yt-dlp output was not valid JSON for {channel_url}") from e
 
+	if not isinstance(response, dict) or not response.get("ok"):
+		err = str(response.get("error") or "").strip() if isinstance(response, dict) else ""
+		msg = f"yt-dlp failed for {channel_url}"
+		if err:
+			msg += f": {err[:5000]}"
+		raise RuntimeError(msg)
+
+	data = response.get("info")
 	if not isinstance(data, dict):
 		raise RuntimeError(f"yt-dlp JSON root was not an object for {channel_url}")
 	return data
@@ -248,24 +362,40 @@ Missing fields are left as None.
 	}
 
 
+_END = object()
+
+
 def _flatten_entries(entries: list[Any]) -> Iterator[dict[str, Any]]:
-	"""Recursively yields video entries, skipping Shorts and Live playlists."""
+	"""Yields video entries depth-first, skipping Shorts and Live playlists.
+
+	Iterative (explicit stack of iterators) rather than recursive, and lazy, so the
+	caller stops the walk as soon as it has enough videos.
+	"""
 	if not entries:
 		return
 
-	for entry in entries:
+	stack = [iter(entries)]
+	while stack:
+		entry = next(stack[-1], _END)
+		if entry is _END:
+			# Current playlist exhausted.
+			stack.pop()
+			continue
 		if not isinstance(entry, dict):
 			continue
 
 		# If it's a nested playlist (e.g. "Videos", "Shorts", "Live")
 		if "entries" in entry:
-			title = entry.get("title", "").lower()
-			# filter out shorts and live
-			if "shorts" in title or "live" in title:
-				continue
-			
-			# Recurse into "Videos" or other playlists
-			yield from _flatten_entries(entry["entries"])
+			title = entry.get("title")
+			if isinstance(title, str):
+				title = title.lower()
+				# filter out shorts and live
+				if "shorts" in title or "live" in title:
+					continue
+			# Descend into "Videos" or other playlists
+			nested = entry["entries"]
+			if nested:
+				stack.append(iter(nested))
 		else:
 			# It's a video entry
 			yield entry
@@ -280,21 +410,12 @@ def parse_channel_videos_raw(
 ) -> list[dict[str, Any]]:
 	"""Extract last-N videos from a yt-dlp dump (flat playlist entries)."""
 	raw_entries = dump.get("entries")
-	if not raw_entries or not isinstance(raw_entries, list):
+	if not raw_entries or not isinstance(raw_entries, list) or max_videos <= 0:
 		return []
 
 	results: list[dict[str, Any]] = []
-	# Use our flattener to get actual videos, then slice
-	flattened = _flatten_entries(raw_entries)
-
-	count = 0
-	for entry in flattened:
-		if count >= max_videos:
-			break
-		
-		if not isinstance(entry, dict):
-			continue
-
+	# The flattener only yields dicts and is lazy: breaking out stops the walk.
+	for entry in _flatten_entries(raw_entries):
 		video_id = entry.get("id")
 		if not isinstance(video_id, str) or not video_id:
 			continue
@@ -325,18 +446,19 @@ def parse_channel_videos_raw(
 				"view_count": view_count,
 			}
 		)
-		count += 1
+		if len(results) >= max_videos:
+			break
 
 	return results
 
 
-def process_one_channel(
+async def process_one_channel(
 	channel_url: str,
-	db: _DBRunner,
+	workers: _YtdlpPool,
 	*,
+	processed: set[str] | frozenset[str] = frozenset(),
 	max_videos: int = 40,
 	timeout_seconds: int = 180,
-	# Note: DB operations are executed on the db runner loop.
 ) -> tuple[str, str]:
 	"""Process a single channel (ONE job = ONE channel).
 
@@ -352,15 +474,16 @@ Returns:
 		# Defensive: empty URL is a failed unit of work.
 		return (channel_url, "failed")
 
-	# Idempotency check: if already processed, skip.
-	if bool(db.run(is_channel_processed(channel_url))):
-		print(f"\033[93m[{_utcnow().strftime('%H:%M:%S')}][skip] already processed: {channel_url}\033[0m")
+	# Idempotency check against the batch's prefetched processed set (no DB hop).
+	if channel_url in processed:
+		_log(logging.INFO, "skip", "already processed: %s", channel_url)
 		return (channel_url, "skipped")
 
 	try:
-		# 1) Fetch real channel data with yt-dlp (subprocess).
-		dump = run_ytdlp_channel_dump(
+		# 1) Fetch real channel data with yt-dlp (persistent worker).
+		dump = await run_ytdlp_channel_dump(
 			channel_url,
+			workers,
 			max_videos=max_videos,
 			timeout_seconds=timeout_seconds,
 		)
@@ -368,12 +491,10 @@ Returns:
 		channel_row = parse_channel_raw(channel_url, dump)
 		video_rows = parse_channel_videos_raw(channel_url, dump, max_videos=max_videos)
 
-		# 3) Persist raw data via db.py (async), executed on the DB loop thread.
-		db.run(upsert_channel_raw(channel_row))
-		db.run(upsert_channel_videos_raw(channel_url, video_rows))
-		# 4) Mark processed ONLY after successful fetch + persistence.
-		db.run(mark_channel_processed(channel_url, status="success"))
-		print(f"\033[92m[{_utcnow().strftime('%H:%M:%S')}][ok] processed: {channel_url} (videos={len(video_rows)})\033[0m")
+		# 3) Persist raw data and 4) mark processed, in one transaction:
+		# a channel is marked processed ONLY if its data was persisted.
+		await persist_channel_bundle(channel_row, video_rows, status="success")
+		_log(logging.INFO, "ok", "processed: %s (videos=%d)", channel_url, len(video_rows))
 		return (channel_url, "processed")
 	except Exception as e:
 		msg = str(e)
@@ -381,17 +502,17 @@ Returns:
 		# "Failed to resolve url" is typical for 404 or deleted channels in yt-dlp.
 		# "HTTP Error 404" is explicit.
 		if "Failed to resolve url" in msg or "HTTP Error 404" in msg or "does the playlist exist" in msg:
-			print(f"\033[91m[{_utcnow().strftime('%H:%M:%S')}][failed-permanent] {channel_url}: Marking as failed. Reason: {msg[:100]}\033[0m")
+			_log(logging.ERROR, "failed-permanent", "%s: Marking as failed. Reason: %s", channel_url, msg[:100])
 			# Mark as processed so we don't retry. Status = "failed".
-			db.run(mark_channel_processed(channel_url, status="failed"))
+			await mark_channel_processed(channel_url, status="failed")
 			return (channel_url, "failed")
 
 		# Transient failure: do NOT mark as processed. Retry next time.
-		print(f"\033[91m[{_utcnow().strftime('%H:%M:%S')}][error] {channel_url}: {e}\033[0m")
+		_log(logging.ERROR, "error", "%s: %s", channel_url, e)
 		return (channel_url, "failed")
 
 
-def run(
+async def run_async(
 	*,
 	limit_channels: int | None = None,
 	max_videos: int = 50,
@@ -399,21 +520,24 @@ def run(
 	timeout_seconds: int = 180,
 	language: str = "es",
 ) -> None:
-	"""Main orchestration: fetch candidates -> process in parallel workers.
+	"""Main orchestration: fetch candidates -> process them concurrently.
 
 	Concurrency model:
-	- DB: single asyncio loop thread (asyncpg-safe)
-	- Workers: ThreadPoolExecutor (each worker runs yt-dlp subprocess + then DB calls via _DBRunner)
+	- One asyncio event loop owns both asyncpg (db.py) and the yt-dlp workers.
+	- MAX_WORKERS persistent yt-dlp processes bound concurrent fetches.
 	"""
-	db = _DBRunner()
-	print(f"\033[94m[info] starting DB loop thread\033[0m")
-	db.start()
+	# Resolved before the DB pool is opened, so a bad value never surfaces mid-setup.
+	max_workers = _worker_count()
+	# init_db() creates the pool and (as designed in db.py) will create tables idempotently.
+	# A small pool is enough: DB work is a short transaction per channel.
+	await init_db(dsn, min_size=1, max_size=4, language=language)
+	workers: _YtdlpPool | None = None
 	try:
-		# Keep asyncpg (db.py) on a single dedicated event loop/thread.
-		# init_db() creates the pool and (as designed in db.py) will create tables idempotently.
-		# Use a small pool size to allow high parallelism of jobs (e.g. 20 jobs * 4 conn = 80 total).
-		db.run(init_db(dsn, min_size=1, max_size=4, language=language))
-		print(f"\033[92m[info] running workers: max_workers={MAX_WORKERS}\033[0m")
+		_log(logging.INFO, "info", "running workers: max_workers=%d", max_workers)
+		# Created once up front; every worker points yt-dlp at the same cache dir.
+		cache_dir = _ytdlp_cache_dir()
+		cache_dir.mkdir(parents=True, exist_ok=True)
+		workers = _YtdlpPool(max_workers, cache_dir)
 
 		processed = 0
 		skipped = 0
@@ -428,54 +552,52 @@ def run(
 			if remaining is not None:
 				batch_limit = min(batch_limit, remaining)
 
-			claimed = db.run(claim_channels_for_discovery(limit=batch_limit))
+			claimed = await claim_channels_for_discovery(limit=batch_limit)
 			if not claimed:
 				break
 
 			if remaining is not None:
 				remaining -= len(claimed)
 
-			print(f"\033[92m[info] claimed batch: {len(claimed)}\033[0m")
-
-			with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-				try:
-					# Submit 1 job per channel.
-					futures = {
-						executor.submit(
-							process_one_channel,
-							channel_url,
-							db,
-							max_videos=max_videos,
-							timeout_seconds=timeout_seconds,
-						): channel_url
-						for channel_url in claimed
-					}
-
-					# Consume results as they complete (out-of-order completion is expected).
-					for future in as_completed(futures):
-						channel_url, status = future.result()
-						if status == "processed":
-							processed += 1
-						elif status == "skipped":
-							skipped += 1
-						else:
-							failed += 1
-				except KeyboardInterrupt:
-					print(f"\n\033[91m[{_utcnow().strftime('%H:%M:%S')}][system] Interrupted by user. Exiting immediately...\033[0m")
-					# Force exit to kill threads immediately
-					os._exit(1)
-
-		print(f"\033[92m[{_utcnow().strftime('%H:%M:%S')}][done] processed={processed} skipped={skipped} failed={failed}\033[0m")
+			_log(logging.INFO, "info", "claimed batch: %d", len(claimed))
+			# One query for the whole batch instead of one idempotency check per channel.
+			already_processed = await fetch_processed_set(claimed)
+
+			# 1 job per channel; process_one_channel never raises for per-channel errors.
+			results = await asyncio.gather(*(
+				process_one_channel(
+					channel_url,
+					workers,
+					processed=already_processed,
+					max_videos=max_videos,
+					timeout_seconds=timeout_seconds,
+				)
+				for channel_url in claimed
+			))
+			for _, status in results:
+				if status == "processed":
+					processed += 1
+				elif status == "skipped":
+					skipped += 1
+				else:
+					failed += 1
+
+		_log(logging.INFO, "done", "processed=%d skipped=%d failed=%d", processed, skipped, failed)
 	finally:
-		# Ensure pool is closed on the DB loop thread.
+		if workers is not None:
+			await workers.close()
 		try:
-			print(f"\033[94m[{_utcnow().strftime('%H:%M:%S')}][info] closing DB pool\033[0m")
-			db.run(close_db())
+			_log(logging.INFO, "info", "closing DB pool")
+			await close_db()
 		except Exception:
 			# Best-effort shutdown; do not mask prior errors.
 			pass
-		print(f"\033[94m[{_utcnow().strftime('%H:%M:%S')}][info] stopping DB loop thread\033[0m")
-		db.stop()
+
+
+def run(**kwargs: Any) -> None:
+	"""Synchronous entrypoint: runs run_async() on a fresh event loop."""
+	# On Windows the default Proactor loop is kept: it is the one that supports subprocesses.
+	asyncio.run(run_async(**kwargs))
 
 
 def _build_arg_parser() -> argparse.ArgumentParser:
@@ -501,11 +623,27 @@ if __name__ == "__main__":
 	load_dotenv()
 	args = _build_arg_parser().parse_args()
 
-	# Keep orchestration synchronous; workers execute yt-dlp concurrently.
-	run(
-		limit_channels=args.limit_channels,
-		max_videos=args.max_videos,
-		dsn=args.dsn,
-		timeout_seconds=args.timeout_seconds,
-		language=args.lang,
-	)
+	# uvloop is optional (not available on Windows); fall back to the stock loop.
+	# It speeds up asyncpg and the worker pipes, which now share the one loop.
+	try:
+		import uvloop
+		asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+	except ImportError:
+		pass
+
+	listener = _start_logging()
+	try:
+		run(
+			limit_channels=args.limit_channels,
+			max_videos=args.max_videos,
+			dsn=args.dsn,
+			timeout_seconds=args.timeout_seconds,
+			language=args.lang,
+		)
+	except KeyboardInterrupt:
+		# asyncio.run() has already cancelled the jobs, which kill their yt-dlp workers.
+		_log(logging.WARNING, "system", "Interrupted by user. Exiting...")
+		sys.exit(1)
+	finally:
+		# Flushes any queued records before exiting.
+		listener.stop()
@@ -1,16 +1,27 @@
 import argparse
 import asyncio
 import json
+import re
 import sys
 from pathlib import Path
 from urllib.parse import quote
 
-from playwright.async_api import async_playwright
+from playwright.async_api import Browser, Error as PlaywrightError, Page, Playwright, TimeoutError as PlaywrightTimeoutError, async_playwright
 
 import db
 from dotenv import load_dotenv
 import os
 
+# orjson is optional: it serializes the --out payload straight to bytes, much faster.
+try:
+	import orjson
+
+	def _dump_results(results: list[dict]) -> bytes:
+		return orjson.dumps(results, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+except ImportError:
+	def _dump_results(results: list[dict]) -> bytes:
+		return json.dumps(results, ensure_ascii=False, indent=2).encode("utf-8")
+
 # Language configuration for bilingual support
 LANG_CONFIG = {
     "en-US": {
@@ -110,6 +121,80 @@ LANG_CONFIG = {
         }
     }
 }
+
+
+# Infinite scroll: a tick ends once the result count has been flat this long (ms)...
+SCROLL_QUIET_MS = 1500
+# ...and scrolling stops after this many flat ticks in a row.
+SCROLL_MAX_STALLS = 5
+
+
+# One Chromium per process: launching costs 1-3s, a new context per query is cheap.
+_playwright: Playwright | None = None
+_browser_singleton: Browser | None = None
+_browser_headless: bool | None = None
+# Concurrent first calls must not each launch (and orphan) a browser.
+_browser_lock = asyncio.Lock()
+
+
+async def _get_browser(headless: bool) -> Browser:
+	"""Return the shared browser, launching it (and Playwright) on first use.
+
+	Raises ValueError if the running browser was launched with a different `headless`
+	mode; other queries may still be using it, so it is not relaunched behind their back.
+	Call close_browser() first to switch modes.
+	"""
+	global _playwright, _browser_singleton, _browser_headless
+	async with _browser_lock:
+		if _browser_singleton is not None and _browser_singleton.is_connected():
+			if headless != _browser_headless:
+				raise ValueError(
+					f"shared browser already running with headless={_browser_headless}; "
+					"call close_browser() before switching modes"
+				)
+			return _browser_singleton
+		if _playwright is None:
+			_playwright = await async_playwright().start()
+		_browser_singleton = await _playwright.chromium.launch(headless=headless)
+		_browser_headless = headless
+		return _browser_singleton
+
+
+async def close_browser() -> None:
+	"""Close the shared browser and stop Playwright (safe to call if never started)."""
+	global _playwright, _browser_singleton, _browser_headless
+	try:
+		if _browser_singleton is not None:
+			await _browser_singleton.close()
+	finally:
+		_browser_singleton = None
+		_browser_headless = None
+		if _playwright is not None:
+			await _playwright.stop()
+			_playwright = None
+
+
+def _debug_slug(query: str) -> str:
+	"""File-name-safe form of a query, so concurrent queries (run_many) keep separate debug files."""
+	return re.sub(r"[^\w-]+", "_", query).strip("_")[:60] or "query"
+
+
+async def _wait_for_filter(page: Page, prev_url: str) -> None:
+	"""Wait for a filter click to take effect (instead of a fixed 800ms sleep).
+
+	Each filter reloads the results under a new URL (`sp=` param), so we wait for the
+	URL to change and for results to render. `networkidle` is not used: YouTube keeps
+	background requests going and it rarely settles.
+	"""
+	try:
+		await page.wait_for_url(lambda url: url != prev_url, timeout=5000)
+		await page.wait_for_selector("ytd-video-renderer", timeout=5000)
+	except PlaywrightTimeoutError:
+		# No navigation (e.g. the filter was already active) or slow render:
+		# carry on, the scroll loop below waits for results anyway.
+		pass
+
+
 async def run(
     query: str,
     *,
@@ -119,174 +204,250 @@ async def run(
     upload_date: str | None = None,
     duration: str | None = None,
     features: list[str] | None = None,
-    sort_by: str | None = None
+    sort_by: str | None = None,
+    browser: Browser | None = None,
+    quiet: bool = False
 ) -> list[dict]:
 	# Force UTF-8 output to handle emojis on Windows CI
 	sys.stdout.reconfigure(encoding='utf-8')
 	
-	# Get language configuration
+	# Get language configuration (sub-tables bound once, used throughout)
 	config = LANG_CONFIG[lang]
+	upload_dates = config["filters"]["upload_date"]
+	durations = config["filters"]["duration"]
+	feat_map = config["filters"]["features"]
+	sort_map = config["filters"]["sort_by"]
+	filters_button = config["ui"]["search_filters"]
+	no_more_msg = config["ui"]["no_more_results"]
 	
-	async with async_playwright() as p:
+	# quiet silences progress messages (warnings are always printed).
+	if not quiet:
 		print(config["messages"]["scraping_started"] + query)
 
-		browser = await p.chromium.launch(headless=headless)
-
-		context = await browser.new_context(
-			locale=config["locale"],
-			timezone_id=config["timezone"],
-			viewport={"width": 1920, "height": 1080},
-			user_agent=(
-				"Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-				"AppleWebKit/537.36 (KHTML, like Gecko) "
-				"Chrome/120.0.0.0 Safari/537.36"
-			),
-			is_mobile=False,
-			has_touch=False,
-			extra_http_headers={
-				"Accept-Language": config["accept_language"]
-			},
-		)
+	# Callers running many queries may pass their own browser; otherwise the module-wide
+	# one is reused. Either way each query only gets its own context.
+	browser = browser or await _get_browser(headless)
 
-		page = await context.new_page()
-		os.makedirs("debug", exist_ok=True)
+	context = await browser.new_context(
+		locale=config["locale"],
+		timezone_id=config["timezone"],
+		viewport={"width": 1920, "height": 1080},
+		user_agent=(
+			"Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+			"AppleWebKit/537.36 (KHTML, like Gecko) "
+			"Chrome/120.0.0.0 Safari/537.36"
+		),
+		is_mobile=False,
+		has_touch=False,
+		extra_http_headers={
+			"Accept-Language": config["accept_language"]
+		},
+	)
 
-		try:
-			await page.goto(
-				f"https://www.youtube.com/results?search_query={quote(query)}",
-				wait_until="domcontentloaded",
-			)
+	# The success-path screenshot is opt-in: it costs seconds per query.
+	debug = bool(os.getenv("YT_DEBUG"))
+	os.makedirs("debug", exist_ok=True)
+
+	# new_page() is inside the try so the context is closed even if it fails; the
+	# browser outlives this call, so a leaked context would stay open for the whole run.
+	page: Page | None = None
+	try:
+		page = await context.new_page()
+		await page.goto(
+			f"https://www.youtube.com/results?search_query={quote(query)}",
+			wait_until="domcontentloaded",
+		)
+		if debug:
 			await page.screenshot(
-				path="debug/01_after_goto.png",
+				path=f"debug/01_after_goto_{_debug_slug(query)}.png",
 				full_page=True
 			)
-		
-			# Apply UI-driven filters based on user arguments
-			filters_button = config["ui"]["search_filters"]
-			# Apply upload date filter if specified
-			if upload_date:
-				filter_text = config["filters"]["upload_date"].get(upload_date)
-				if filter_text:
-					await page.get_by_role("button", name=filters_button).click()
-					await page.get_by_role("link", name=filter_text).click()
-					await page.wait_for_timeout(800)
-			
-			# Apply duration filter if specified
-			if duration:
-				filter_text = config["filters"]["duration"].get(duration)
-				if filter_text:
-					await page.get_by_role("button", name=filters_button).click()
-					await page.get_by_role("link", name=filter_text).click()
-					await page.wait_for_timeout(800)
-			
-			# Apply features filters if specified
-			if features:
-				for feature in features:
-					filter_text = config["filters"]["features"].get(feature)
-					if filter_text:
-						await page.get_by_role("button", name=filters_button).click()
-						await page.get_by_role("link", name=filter_text).click()
-						await page.wait_for_timeout(800)
-			
-			# Apply sort by filter if specified
-			if sort_by:
-				filter_text = config["filters"]["sort_by"].get(sort_by)
-				if filter_text:
-					await page.get_by_role("button", name=filters_button).click()
-					await page.get_by_role("link", name=filter_text).click()
-					await page.wait_for_timeout(800)
-
-			# Scroll to bottom until 'No more results' message is found
-			no_more_msg = config["ui"]["no_more_results"]
-			while True:
-				# Scroll down by evaluating scroll on the ytd-app element
-				await page.evaluate("document.querySelector('ytd-app').scrollIntoView({block: 'end', behavior: 'smooth'});")
-				# Wait for results to load
-				await asyncio.sleep(2)
-
-				# Check for 'No more results' message (supports both languages)
-				no_more_results = await page.locator(
-					f"xpath=//yt-formatted-string[contains(text(), '{no_more_msg}')]"
-				).count()
-				if no_more_results > 0:
-					break
-
-			await page.wait_for_selector("ytd-video-renderer")
-
-			results: list[dict] = await page.evaluate(
+	
+		# Apply UI-driven filters based on user arguments
+		# The filters button locator is built once and reused for every filter.
+		filters_btn = page.get_by_role("button", name=filters_button)
+
+		async def _apply(options: dict[str, str], key: str) -> None:
+			filter_text = options.get(key)
+			if not filter_text:
+				return
+			await filters_btn.click()
+			prev_url = page.url
+			await page.get_by_role("link", name=filter_text).click()
+			await _wait_for_filter(page, prev_url)
+
+		if upload_date:
+			await _apply(upload_dates, upload_date)
+		if duration:
+			await _apply(durations, duration)
+		for feature in features or ():
+			await _apply(feat_map, feature)
+		if sort_by:
+			await _apply(sort_map, sort_by)
+
+		# Scroll to bottom until 'No more results' message is found
+		prev_count = 0
+		stalls = 0
+		tick = 0
+		while True:
+			# Jump to the bottom (no element lookup, no smooth-scroll animation); YouTube's
+			# infinite scroll triggers on position alone.
+			await page.evaluate("window.scrollTo(0, document.documentElement.scrollHeight)")
+			# Wait for results to load: resolves as soon as the 'No more results' message
+			# shows up or the renderer count grows, or once it has stayed flat for
+			# SCROLL_QUIET_MS (instead of a fixed 2s sleep). All checks run in the page,
+			# so each tick is one round trip.
+			tick += 1
+			handle = await page.wait_for_function(
 				"""
-								(query) => {
-									return Array.from(document.querySelectorAll('ytd-video-renderer')).map(video => {
-										const videoLink = video.querySelector('a#video-title')?.href;
-										const videoId = videoLink
-											? new URL(videoLink).searchParams.get('v')
-											: null;
-
-										const channelAnchors = [
-										...video.querySelectorAll(
-											'a#channel-thumbnail[href], ytd-channel-name a[href], a[href^="/@"], a[href^="/channel/"], a[href^="/c/"]'
-										)
-										];
-
-										// deduplicar
-										const channels = Array.from(
-										new Map(
-											channelAnchors.map(a => [
-											a.getAttribute('href'),
-											{
-												name: a.textContent?.trim() || null,
-												url: 'https://www.youtube.com' + a.getAttribute('href')
-											}
-											])
-										).values()
-										);
-
-										const duration = video
-											.querySelector('ytd-thumbnail-overlay-time-status-renderer badge-shape div')
-											?.textContent.trim() || null;
-
-										const meta = video.querySelectorAll(
-											'#metadata-line span.inline-metadata-item'
-										);
-
-										const viewsText = meta[0]?.textContent.trim() || null;
-										const publishedText = meta[1]?.textContent.trim() || null;
-
-										const videoType =
-											duration && duration.includes(':')
-												? 'video'
-												: 'short';
-
-										return {
-										  query,
-										  video_id: videoId,
-										  channels,              // <-- CAMBIO CLAVE
-										  duration,
-										  published_text: publishedText,
-										  views_text: viewsText,
-										  video_type: videoType,
-										  is_multi_creator: channels.length > 1
-										};
-									});
-								}
+				([prev, tick, quietMs, msg]) => {
+					const n = document.querySelectorAll('ytd-video-renderer').length;
+					// The end message lives in a ytd-message-renderer; scanning only those keeps
+					// each poll cheap no matter how many results the page holds.
+					for (const e of document.querySelectorAll('ytd-message-renderer')) {
+						if (e.textContent.includes(msg)) return { count: n, grew: n > prev, done: true };
+					}
+					if (n > prev) return { count: n, grew: true };
+					if (window.__ytScrollTick !== tick) {
+						window.__ytScrollTick = tick;
+						window.__ytScrollSince = Date.now();
+					}
+					return Date.now() - window.__ytScrollSince >= quietMs
+						? { count: n, grew: false }
+						: false;
+				}
 				""",
-				query,
+				arg=[prev_count, tick, SCROLL_QUIET_MS, no_more_msg],
+				polling=250,
 			)
+			state = await handle.json_value()
+			# Release the remote object, or long scrolls keep one alive per tick.
+			await handle.dispose()
+			prev_count = state["count"]
 
-			if limit is not None:
-				return results[: max(0, limit)]
-			return results
-		except: 
-			await page.screenshot(
-				path="debug/02_no_filters_button.png",
-				full_page=True
-			)
-			return []
-		finally:
-			html = await page.content()
-			with open("debug/03_html.html", "w", encoding="utf-8") as f:
-				f.write(html)
-			await browser.close()
+			# 'No more results' message found (supports both languages)
+			if state.get("done"):
+				break
+
+			# Stall guard: stop if nothing new loads for several ticks in a row
+			# (e.g. the end message never renders), instead of scrolling forever.
+			stalls = 0 if state["grew"] else stalls + 1
+			if stalls >= SCROLL_MAX_STALLS:
+				break
+
+		await page.wait_for_selector("ytd-video-renderer")
+
+		# One $$eval over the renderers; per video: regex for the id (no URL parsing)
+		# and a single pass over the channel anchors.
+		results: list[dict] = await page.eval_on_selector_all(
+			"ytd-video-renderer",
+			"""
+							(videos, [query, limit]) => {
+								const VIDEO_ID_RE = /[?&]v=([^&#]+)/;
+								const CHANNEL_SEL =
+									'a#channel-thumbnail[href], ytd-channel-name a[href], a[href^="/@"], a[href^="/channel/"], a[href^="/c/"]';
+
+								// solo se recorren (y serializan) los renderers que se van a devolver
+								if (limit !== null) videos = videos.slice(0, Math.max(0, limit));
+
+								return videos.map(video => {
+									const videoLink = video.querySelector('a#video-title')?.href;
+									const idMatch = videoLink ? VIDEO_ID_RE.exec(videoLink) : null;
+									const videoId = idMatch ? idMatch[1] : null;
+
+									// deduplicar por href: conserva el orden de la primera aparición y,
+									// como el Map anterior, el nombre de la última
+									const channels = [];
+									const seen = new Map();
+									for (const a of video.querySelectorAll(CHANNEL_SEL)) {
+										const href = a.getAttribute('href');
+										const channel = {
+											name: a.textContent?.trim() || null,
+											url: 'https://www.youtube.com' + href
+										};
+										const i = seen.get(href);
+										if (i === undefined) {
+											seen.set(href, channels.length);
+											channels.push(channel);
+										} else {
+											channels[i] = channel;
+										}
+									}
+
+									const duration = video
+										.querySelector('ytd-thumbnail-overlay-time-status-renderer badge-shape div')
+										?.textContent.trim() || null;
+
+									const meta = video.querySelectorAll(
+										'#metadata-line span.inline-metadata-item'
+									);
+
+									const viewsText = meta[0]?.textContent.trim() || null;
+									const publishedText = meta[1]?.textContent.trim() || null;
+
+									const videoType =
+										duration && duration.includes(':')
+											? 'video'
+											: 'short';
+
+									return {
+									  query,
+									  video_id: videoId,
+									  channels,              // <-- CAMBIO CLAVE
+									  duration,
+									  published_text: publishedText,
+									  views_text: viewsText,
+									  video_type: videoType,
+									  is_multi_creator: channels.length > 1
+									};
+								});
+							}
+			""",
+			[query, limit],
+		)
+		return results
+	except (PlaywrightTimeoutError, PlaywrightError) as e:
+		# Only Playwright failures are scraping failures; anything else (including
+		# cancellation) propagates. The page state is kept for debugging.
+		print(f"⚠️ Scraping failed for '{query}': {e}")
+		if page is not None:
+			slug = _debug_slug(query)
+			try:
+				await page.screenshot(
+					path=f"debug/02_no_filters_button_{slug}.png",
+					full_page=True
+				)
+				html = await page.content()
+				with open(f"debug/03_html_{slug}.html", "w", encoding="utf-8") as f:
+					f.write(html)
+			except PlaywrightError as dump_error:
+				# The page may already be gone; the artifacts are best-effort, the result is [].
+				print(f"⚠️ Could not save debug artifacts for '{query}': {dump_error}")
+		return []
+	finally:
+		await context.close()
+
+
+async def run_many(
+	queries: list[str],
+	*,
+	headless: bool = True,
+	max_concurrency: int = 3,
+	**kwargs,
+) -> list[list[dict]]:
+	"""Scrape several queries concurrently on one shared browser.
+
+	At most `max_concurrency` queries are in flight, each in its own context (see run()).
+	Remaining keyword arguments are passed to run(). Results keep the order of `queries`.
+	"""
+	browser = kwargs.pop("browser", None) or await _get_browser(headless)
+	sem = asyncio.Semaphore(max(1, max_concurrency))
+
+	async def _run_one(query: str) -> list[dict]:
+		async with sem:
+			return await run(query, headless=headless, browser=browser, **kwargs)
+
+	return list(await asyncio.gather(*(_run_one(q) for q in queries)))
 
 
 def parse_args() -> argparse.Namespace:
@@ -370,22 +531,80 @@ def parse_args() -> argparse.Namespace:
 		return parser.parse_args()
 
 
+def _write_results(out: Path, results: list[dict]) -> None:
+	out.parent.mkdir(parents=True, exist_ok=True)
+	out.write_bytes(_dump_results(results))
+
+
+async def run_discovery(
+	query: str,
+	*,
+	headless: bool = True,
+	limit: int | None = None,
+	lang: str = "es-MX",
+	upload_date: str | None = None,
+	duration: str | None = None,
+	features: list[str] | None = None,
+	sort_by: str | None = None,
+	out: Path | None = None,
+	browser: Browser | None = None,
+	quiet: bool = False,
+) -> int:
+	"""Scrape one query and persist it as a search run.
+
+	Expects db.init_db() to have been awaited by the caller, so several queries can
+	share one pool. Returns the number of results scraped.
+	"""
+	config = LANG_CONFIG[lang]
+	search_run_id = await db.create_search_run(query, mode="exploration")
+	write_task: asyncio.Task | None = None
+	try:
+		results = await run(
+			query,
+			headless=headless,
+			limit=limit,
+			lang=lang,
+			upload_date=upload_date,
+			duration=duration,
+			features=features,
+			sort_by=sort_by,
+			browser=browser,
+			quiet=quiet
+		)
+		if not quiet:
+			print(config["messages"]["scraping_completed"].format(len(results)))
+		inserted, ignored = await db.insert_videos_raw(search_run_id, results)
+		if not quiet:
+			print(config["messages"]["db_inserted"].format(inserted, ignored))
+
+		if out:
+			# Serialized and written off the event loop, overlapping finish_search_run below.
+			write_task = asyncio.create_task(asyncio.to_thread(_write_results, out, results))
+		return len(results)
+	finally:
+		try:
+			await db.finish_search_run(search_run_id)
+		except Exception as e:
+			print(f"⚠️ Error finishing search run: {e}")
+		if write_task is not None:
+			await write_task
+			if not quiet:
+				print(config["messages"]["results_written"].format(out))
+
+
 def main() -> None:
 		args = parse_args()
 		headless = False if args.headed else True
-		config = LANG_CONFIG[args.lang]
+		# Read .env once, before the event loop starts.
+		load_dotenv()
 
 		async def _main_async() -> None:
 			# DB lifecycle is intentionally handled via db.py (no SQL here).
-			load_dotenv()
 			# Pass language to init_db for table naming (convert locale to simple lang code)
 			language = "en" if args.lang == "en-US" else "es"
-			search_run_id = None
 			try:
 				await db.init_db(language=language)
-				search_run_id = await db.create_search_run(args.query, mode="exploration")
-				
-				results = await run(
+				await run_discovery(
 					args.query,
 					headless=headless,
 					limit=args.limit,
@@ -393,31 +612,19 @@ def main() -> None:
 					upload_date=args.upload_date,
 					duration=args.duration,
 					features=args.features,
-					sort_by=args.sort_by
+					sort_by=args.sort_by,
+					out=args.out,
 				)
-				print(config["messages"]["scraping_completed"].format(len(results)))
-				inserted, ignored = await db.insert_videos_raw(search_run_id, results)
-				print(config["messages"]["db_inserted"].format(inserted, ignored))
-				payload = json.dumps(results, ensure_ascii=False, indent=2)
-
-				if args.out:
-					args.out.parent.mkdir(parents=True, exist_ok=True)
-					args.out.write_text(payload, encoding="utf-8")
-					print(config["messages"]["results_written"].format(args.out))
 			except Exception as e:
 				print(f"⚠️ Error during execution: {e}")
 				raise
 			finally:
 				# Safely close DB even if there were errors
-				try:
-					if search_run_id:
-						await db.finish_search_run(search_run_id)
-				except Exception as e:
-					print(f"⚠️ Error finishing search run: {e}")
 				try:
 					await db.close_db()
 				except Exception as e:
 					print(f"⚠️ Error closing database: {e}")
+				await close_browser()
 
 		asyncio.run(_main_async())
 
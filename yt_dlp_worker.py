@@ -0,0 +1,105 @@
+"""Persistent yt-dlp worker process (used by yt_channel_discovery).
+
+Protocol (one JSON object per line):
+- stdin:  {"url": "...", "playlist_end": N}
+- stdout: {"ok": true, "info": {...}} or {"ok": false, "error": "..."}
+
+yt_dlp is imported once per process and the YoutubeDL instance is reused, so
+every channel after the first skips interpreter startup, module imports and
+extractor setup.
+
+Options mirror the one-shot CLI call this replaces:
+	yt-dlp --dump-single-json --flat-playlist --extractor-args youtubetab:approximate_date
+	       --playlist-end N --skip-download --no-warnings
+
+Usage: python yt_dlp_worker.py [CACHE_DIR]
+CACHE_DIR (yt-dlp --cache-dir) is shared by all workers, so cached extractor
+data fetched by one worker is reused by the others.
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+from typing import Any
+
+from yt_dlp import YoutubeDL
+
+# orjson is optional: faster serialization of the (sanitized, JSON-safe) info dict.
+try:
+	import orjson
+
+	def _dumps(obj: Any) -> bytes:
+		try:
+			return orjson.dumps(obj)
+		except TypeError:
+			# orjson rejects ints wider than 64 bits and non-str keys; stdlib json doesn't.
+			return json.dumps(obj).encode("utf-8")
+except ImportError:
+	def _dumps(obj: Any) -> bytes:
+		return json.dumps(obj).encode("utf-8")
+
+# YoutubeDL options are fixed at construction, so one instance is kept per
+# playlist_end (in practice a single one per run).
+_YDL_CACHE: dict[int, YoutubeDL] = {}
+
+_CACHE_DIR: str | None = None
+
+
+def _ydl_options(playlist_end: int) -> dict[str, Any]:
+	return {
+		"extract_flat": "in_playlist",
+		"extractor_args": {"youtubetab": {"approximate_date": [""]}},
+		"playlistend": playlist_end,
+		"skip_download": True,
+		"quiet": True,
+		"no_warnings": True,
+		**({"cachedir": _CACHE_DIR} if _CACHE_DIR else {}),
+	}
+
+
+def _handle(request: dict[str, Any]) -> dict[str, Any]:
+	url = request.get("url")
+	if not isinstance(url, str) or not url:
+		raise ValueError("url is required")
+	playlist_end = request.get("playlist_end")
+	if not isinstance(playlist_end, int) or playlist_end <= 0:
+		playlist_end = 1
+
+	ydl = _YDL_CACHE.get(playlist_end)
+	if ydl is None:
+		ydl = _YDL_CACHE[playlist_end] = YoutubeDL(_ydl_options(playlist_end))
+	info = ydl.extract_info(url, download=False)
+	return {"ok": True, "info": ydl.sanitize_info(info)}
+
+
+def main() -> None:
+	global _CACHE_DIR
+	if len(sys.argv) > 1 and sys.argv[1]:
+		_CACHE_DIR = sys.argv[1]
+
+	out = sys.stdout.buffer
+	# Keep the protocol stream clean: anything yt-dlp (or a library) prints goes to stderr.
+	sys.stdout = sys.stderr
+
+	try:
+		for line in sys.stdin:
+			line = line.strip()
+			if not line:
+				continue
+			try:
+				payload = _dumps(_handle(json.loads(line)))
+			except Exception as e:
+				# DownloadError messages keep yt-dlp's wording ("HTTP Error 404", ...),
+				# which the orchestrator uses to detect permanent failures. Serialization
+				# errors land here too, so one bad info dict never kills the worker.
+				payload = _dumps({"ok": False, "error": str(e)})
+			out.write(payload + b"\n")
+			out.flush()
+	finally:
+		for ydl in _YDL_CACHE.values():
+			ydl.close()
+
+
+if __name__ == "__main__":
+	main()
@@ -1,10 +1,15 @@
 from __future__ import annotations
 
 import asyncio
+import multiprocessing
+import os
 import re
-from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import aclosing
+from dataclasses import dataclass, fields
 from datetime import datetime, timedelta, timezone
-from typing import Any, Iterable
+from functools import lru_cache
+from typing import Any, AsyncIterator, Iterable, Iterator
 
 import db
 from dotenv import load_dotenv
@@ -14,24 +19,67 @@ def _utcnow() -> datetime:
 
 
 def normalize_text(value: str | None) -> str | None:
-	"""Basic text normalization: strip + collapse whitespace."""
-	if value is None:
-		return None
-	if not isinstance(value, str):
-		return None
-	text = value.strip()
+	"""Basic text normalization: strip + collapse whitespace.
+
+	Callers pass str or None (see _strfield); other types are not re-checked here.
+	"""
+	text = value.strip() if value else None
 	if not text:
 		return None
-	text = re.sub(r"\s+", " ", text)
-	return text
+	return _WS_RE.sub(" ", text)
+
+
+def _strfield(raw: dict[str, Any], key: str) -> str | None:
+	value = raw.get(key)
+	return value if type(value) is str else None
+
 
+# Patterns and lookup tables are built once at import; the parsers below run per raw row.
+_WS_RE = re.compile(r"\s+")
 
 _VIEWS_NUMBER_RE = re.compile(
 	r"(?P<num>(?:\d{1,3}(?:[\.,]\d{3})+|\d+)(?:[\.,]\d+)?)\s*(?P<suf>[kmb]|mil|millon|millones|millón|billones|billon|bn)?",
 	flags=re.IGNORECASE,
 )
 
+# Words around the views number (alternation order matters: "views" before "view").
+_VIEW_TOKENS = ("views", "view", "vistas", "visualizaciones", "reproducciones", "de", "•")
+_VIEW_TOKEN_RE = re.compile("|".join(map(re.escape, _VIEW_TOKENS)))
+
+_SUFFIX_MULTIPLIER = {
+	"k": 1_000,
+	"mil": 1_000,
+	"m": 1_000_000,
+	"millon": 1_000_000,
+	"millón": 1_000_000,
+	"millones": 1_000_000,
+	"b": 1_000_000_000,
+	"bn": 1_000_000_000,
+	"billon": 1_000_000_000,
+	"billones": 1_000_000_000,
+	# Edge-case: regex might capture 'mb' from some locale; interpret as millions.
+	"mb": 1_000_000,
+}
+
+# Duration units, tried in order per component (first match wins).
+_DURATION_UNIT_RES = {
+	unit: tuple(re.compile(rf"(\d+)\s*{pat}\b") for pat in pats)
+	for unit, pats in (
+		("hours", ("h", "hr", "hrs", "hour", "hours", "hora", "horas")),
+		("minutes", ("m", "min", "mins", "minute", "minutes", "minuto", "minutos")),
+		("seconds", ("s", "sec", "secs", "second", "seconds", "segundo", "segundos")),
+	)
+}
+
+_PUBLISHED_PREFIX_RE = re.compile(
+	"|".join(map(re.escape, ("premiered", "streamed", "hace", "emitido", "estrenado", "transmitido", "se emitió")))
+)
+_RELATIVE_EN = re.compile(r"(\d+)\s*(minute|min|hour|day|week|month|year)s?\b")
+_RELATIVE_ES = re.compile(r"(\d+)\s*(minuto|hora|d[ií]a|dia|semana|mes|a[nñ]o)s?\b")
+_ACCENTS = str.maketrans("íñáéóú", "inaeou")
+
 
+@lru_cache(maxsize=4096)
 def parse_views_text(views_text: str | None) -> int | None:
 	"""Parse a YouTube views string into an integer.
 
@@ -51,18 +99,7 @@ def parse_views_text(views_text: str | None) -> int | None:
 		return 0
 
 	# Remove words around the number.
-	cleaned = lower
-	for token in (
-		"views",
-		"view",
-		"vistas",
-		"visualizaciones",
-		"reproducciones",
-		"de",
-		"•",
-	):
-		cleaned = cleaned.replace(token, " ")
-	cleaned = normalize_text(cleaned) or ""
+	cleaned = normalize_text(_VIEW_TOKEN_RE.sub(" ", lower)) or ""
 
 	m = _VIEWS_NUMBER_RE.search(cleaned)
 	if not m:
@@ -80,16 +117,7 @@ def parse_views_text(views_text: str | None) -> int | None:
 	except ValueError:
 		return None
 
-	multiplier = 1
-	if suf_raw in ("k", "mil"):
-		multiplier = 1_000
-	elif suf_raw in ("m", "millon", "millón", "millones"):
-		multiplier = 1_000_000
-	elif suf_raw in ("b", "bn", "billon", "billones"):
-		multiplier = 1_000_000_000
-	elif suf_raw == "mb":
-		# Edge-case: regex might capture 'mb' from some locale; interpret as millions.
-		multiplier = 1_000_000
+	multiplier = _SUFFIX_MULTIPLIER.get(suf_raw, 1)
 
 	value = int(num * multiplier)
 	return max(0, value)
@@ -136,6 +164,7 @@ def _parse_human_number(num_raw: str, *, has_suffix: bool) -> float:
 	return float(s)
 
 
+@lru_cache(maxsize=4096)
 def parse_duration_text(duration_text: str | None) -> int | None:
 	"""Parse duration into seconds.
 
@@ -162,18 +191,18 @@ def parse_duration_text(duration_text: str | None) -> int | None:
 	lower = text.lower()
 	# Normalize separators.
 	lower = lower.replace(",", " ").replace("·", " ")
-	lower = re.sub(r"\s+", " ", lower).strip()
+	lower = _WS_RE.sub(" ", lower).strip()
 
-	def _find(unit_patterns: Iterable[str]) -> int:
+	def _find(unit_patterns: Iterable[re.Pattern[str]]) -> int:
 		for pat in unit_patterns:
-			m = re.search(rf"(\d+)\s*{pat}\b", lower)
+			m = pat.search(lower)
 			if m:
 				return int(m.group(1))
 		return 0
 
-	hours = _find(("h", "hr", "hrs", "hour", "hours", "hora", "horas"))
-	minutes = _find(("m", "min", "mins", "minute", "minutes", "minuto", "minutos"))
-	seconds = _find(("s", "sec", "secs", "second", "seconds", "segundo", "segundos"))
+	hours = _find(_DURATION_UNIT_RES["hours"])
+	minutes = _find(_DURATION_UNIT_RES["minutes"])
+	seconds = _find(_DURATION_UNIT_RES["seconds"])
 
 	if hours == 0 and minutes == 0 and seconds == 0:
 		return None
@@ -190,49 +219,40 @@ def parse_published_text(published_text: str | None, *, now: datetime | None = N
 
 	Also tries a few absolute formats: "Jan 3, 2024", "2024-01-03".
 """
-	text = normalize_text(published_text)
-	if not text:
-		return None
+	parsed = _parse_published(published_text)
+	if parsed is None or isinstance(parsed, datetime):
+		return parsed
 	if now is None:
 		now = _utcnow()
 	# ensure timezone-aware
 	if now.tzinfo is None:
 		now = now.replace(tzinfo=timezone.utc)
+	return now - parsed
+
+
+@lru_cache(maxsize=4096)
+def _parse_published(published_text: str | None) -> timedelta | datetime | None:
+	"""`now`-independent part of parse_published_text: a delta for relative texts,
+	an absolute UTC datetime otherwise (cached, texts repeat a lot across rows)."""
+	text = normalize_text(published_text)
+	if not text:
+		return None
 
 	lower = text.lower()
 	# Remove leading phrases.
-	for prefix in (
-		"premiered",
-		"streamed",
-		"hace",
-		"emitido",
-		"estrenado",
-		"transmitido",
-		"se emitió",
-	):
-		lower = lower.replace(prefix, " ")
-	lower = normalize_text(lower) or ""
+	lower = normalize_text(_PUBLISHED_PREFIX_RE.sub(" ", lower)) or ""
 
 	if "yesterday" in lower or "ayer" in lower:
-		return now - timedelta(days=1)
+		return timedelta(days=1)
 
 	# Relative pattern: "X unit ago" or "hace X unidad"
-	m = re.search(r"(\d+)\s*(minute|min|hour|day|week|month|year)s?\b", lower)
+	m = _RELATIVE_EN.search(lower)
 	if not m:
-		m = re.search(r"(\d+)\s*(minuto|hora|d[ií]a|dia|semana|mes|a[nñ]o)s?\b", lower)
+		m = _RELATIVE_ES.search(lower)
 
 	if m:
 		qty = int(m.group(1))
-		unit = m.group(2)
-		unit = (
-			unit.replace("í", "i")
-			.replace("ñ", "n")
-			.replace("á", "a")
-			.replace("é", "e")
-			.replace("ó", "o")
-			.replace("ú", "u")
-		)
-		unit = unit.lower()
+		unit = m.group(2).translate(_ACCENTS).lower()
 		if unit in ("minute", "min", "minuto"):
 			delta = timedelta(minutes=qty)
 		elif unit in ("hour", "hora"):
@@ -247,7 +267,7 @@ def parse_published_text(published_text: str | None, *, now: datetime | None = N
 			delta = timedelta(days=365 * qty)
 		else:
 			delta = None
-		return (now - delta) if delta else None
+		return delta or None
 
 	# Absolute formats (best-effort)
 	for fmt in ("%Y-%m-%d", "%b %d, %Y", "%B %d, %Y", "%d %b %Y", "%d %B %Y"):
@@ -260,12 +280,19 @@ def parse_published_text(published_text: str | None, *, now: datetime | None = N
 	return None
 
 
-@dataclass(frozen=True)
+@dataclass(slots=True, frozen=True)
 class ValidationResult:
 	passed: bool
 	reason: str | None
 
 
+# validate_video has only these outcomes; sharing the (immutable) instances avoids one
+# allocation per row.
+_VALID = ValidationResult(True, None)
+_DURATION_TOO_LOW = ValidationResult(False, "duration_too_low")
+_VIEWS_TOO_LOW = ValidationResult(False, "views_too_low")
+
+
 def validate_video(
 	*,
 	views_estimated: int | None,
@@ -280,30 +307,52 @@ def validate_video(
 		now = now.replace(tzinfo=timezone.utc)
 
 	if duration_seconds_estimated is not None and duration_seconds_estimated < 180:
-		return ValidationResult(False, "duration_too_low")
+		return _DURATION_TOO_LOW
 
 	if views_estimated is not None and views_estimated < 1000:
-		return ValidationResult(False, "views_too_low")
+		return _VIEWS_TOO_LOW
 
-	return ValidationResult(True, None)
+	return _VALID
 
 
-def normalize_raw_video(raw: dict[str, Any], *, now: datetime | None = None) -> dict[str, Any] | None:
-	"""Normalize a raw video row into a `videos_normalized` insert payload."""
+@dataclass(slots=True, frozen=True)
+class NormalizedVideo:
+	"""One `videos_normalized` row (fields in table column order)."""
+	video_id: str
+	channel_url: str | None
+	query: str | None
+	views_estimated: int | None
+	published_at_estimated: datetime | None
+	duration_seconds_estimated: int | None
+	validation_passed: bool
+	validation_reason: str | None
+	normalized_at: datetime
+
+
+_NORMALIZED_FIELDS = tuple(f.name for f in fields(NormalizedVideo))
+
+
+def _to_columns(videos: list[NormalizedVideo]) -> dict[str, list[Any]]:
+	"""Transpose rows into one list per column for db.insert_videos_normalized_columns."""
+	return {name: [getattr(v, name) for v in videos] for name in _NORMALIZED_FIELDS}
+
+
+def normalize_raw_video(raw: dict[str, Any], *, now: datetime | None = None) -> NormalizedVideo | None:
+	"""Normalize a raw video row into a `videos_normalized` row."""
 	if now is None:
 		now = _utcnow()
 	if now.tzinfo is None:
 		now = now.replace(tzinfo=timezone.utc)
 
-	video_id = raw.get("video_id")
-	if not isinstance(video_id, str) or not video_id:
+	video_id = _strfield(raw, "video_id")
+	if not video_id:
 		return None
 
-	channel_url = normalize_text(raw.get("channel_url") if isinstance(raw.get("channel_url"), str) else None)
-	query = normalize_text(raw.get("query") if isinstance(raw.get("query"), str) else None)
-	views_text = raw.get("views_text") if isinstance(raw.get("views_text"), str) else None
-	published_text = raw.get("published_text") if isinstance(raw.get("published_text"), str) else None
-	duration_text = raw.get("duration_text") if isinstance(raw.get("duration_text"), str) else None
+	channel_url = normalize_text(_strfield(raw, "channel_url"))
+	query = normalize_text(_strfield(raw, "query"))
+	views_text = _strfield(raw, "views_text")
+	published_text = _strfield(raw, "published_text")
+	duration_text = _strfield(raw, "duration_text")
 
 	views_estimated = parse_views_text(views_text)
 	published_at_estimated = parse_published_text(published_text, now=now)
@@ -316,17 +365,77 @@ def normalize_raw_video(raw: dict[str, Any], *, now: datetime | None = None) ->
 		now=now,
 	)
 
-	return {
-		"video_id": video_id,
-		"channel_url": channel_url,
-		"query": query,
-		"views_estimated": views_estimated,
-		"published_at_estimated": published_at_estimated,
-		"duration_seconds_estimated": duration_seconds_estimated,
-		"validation_passed": vr.passed,
-		"validation_reason": vr.reason,
-		"normalized_at": now,
-	}
+	return NormalizedVideo(
+		video_id=video_id,
+		channel_url=channel_url,
+		query=query,
+		views_estimated=views_estimated,
+		published_at_estimated=published_at_estimated,
+		duration_seconds_estimated=duration_seconds_estimated,
+		validation_passed=vr.passed,
+		validation_reason=vr.reason,
+		normalized_at=now,
+	)
+
+
+# Normalization is pure CPU: large batches are split across processes.
+_NORMALIZE_CHUNK_SIZE = 500
+# Below this many rows, process startup costs more than it saves.
+_PARALLEL_MIN_ROWS = 2000
+
+
+def _normalize_chunk(chunk: list[dict[str, Any]], now: datetime) -> list[NormalizedVideo]:
+	"""Normalize a slice of raw rows (top-level so worker processes can import it)."""
+	prepared: list[NormalizedVideo] = []
+	for r in chunk:
+		row = normalize_raw_video(r, now=now)
+		if row is not None:
+			prepared.append(row)
+	return prepared
+
+
+def _chunks(items: list[Any], size: int) -> Iterator[list[Any]]:
+	for i in range(0, len(items), size):
+		yield items[i:i + size]
+
+
+async def _iter_normalized(raw_rows: list[Any], now: datetime) -> AsyncIterator[list[NormalizedVideo]]:
+	"""Yield normalized rows chunk by chunk, in input order.
+
+	Large batches go to a process pool with every chunk submitted up front, so while the
+	caller inserts one chunk the following ones are still being normalized.
+	"""
+	workers = os.cpu_count() or 1
+	if len(raw_rows) < _PARALLEL_MIN_ROWS or workers < 2:
+		for chunk in _chunks(raw_rows, _NORMALIZE_CHUNK_SIZE):
+			yield _normalize_chunk(chunk, now)
+		return
+
+	loop = asyncio.get_running_loop()
+	# Never fork from here: this process runs an event loop, an asyncpg pool and executor
+	# threads. forkserver/spawn start workers from a clean interpreter instead.
+	methods = multiprocessing.get_all_start_methods()
+	mp_context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+	pool = ProcessPoolExecutor(max_workers=workers, mp_context=mp_context)
+	futures: list[asyncio.Future[list[NormalizedVideo]]] = []
+	completed = False
+	try:
+		futures = [
+			loop.run_in_executor(pool, _normalize_chunk, chunk, now)
+			for chunk in _chunks(raw_rows, _NORMALIZE_CHUNK_SIZE)
+		]
+		for fut in futures:
+			yield await fut
+		completed = True
+	finally:
+		if completed:
+			pool.shutdown()
+		else:
+			# Early exit (consumer failed or was cancelled): drop queued chunks instead of
+			# blocking the event loop until they are all normalized and thrown away.
+			for fut in futures:
+				fut.cancel()
+			pool.shutdown(wait=False, cancel_futures=True)
 
 
 async def run_normalization(*, limit: int | None = None, bulk: bool = True) -> dict[str, int]:
@@ -334,7 +443,7 @@ async def run_normalization(*, limit: int | None = None, bulk: bool = True) -> d
 	
 	Args:
 		limit: fast exit after fetching this many raw rows (approx).
-		bulk: if True, batch insert all results at once (faster).
+		bulk: if True, batch insert in chunks of _NORMALIZE_CHUNK_SIZE rows (faster).
 			  if False, insert one by one (slower, but maybe safer for partial failures).
 	"""
 	raw_rows = await db.fetch_unprocessed_videos_raw(limit=limit)
@@ -346,33 +455,27 @@ async def run_normalization(*, limit: int | None = None, bulk: bool = True) -> d
 	# Common stats
 	stats = {"fetched": len(raw_rows), "prepared": 0, "inserted": 0, "ignored": 0}
 	
-	prepared: list[dict[str, Any]] = []
-	for r in raw_rows:
-		row = normalize_raw_video(r, now=now)
-		if row is not None:
-			prepared.append(row)
-	
-	stats["prepared"] = len(prepared)
-	
-	if not prepared:
-		return stats
-
-	if bulk:
-		inserted, ignored = await db.insert_videos_normalized(prepared)
-		stats["inserted"] = inserted
-		stats["ignored"] = ignored
-	else:
-		# Individual insert mode
-		for p in prepared:
-			inserted, ignored = await db.insert_videos_normalized([p])
-			stats["inserted"] += inserted
-			stats["ignored"] += ignored
+	async with aclosing(_iter_normalized(raw_rows, now)) as chunks:
+		async for prepared in chunks:
+			stats["prepared"] += len(prepared)
+			if not prepared:
+				continue
+
+			if bulk:
+				inserted, ignored = await db.insert_videos_normalized_columns(_to_columns(prepared))
+				stats["inserted"] += inserted
+				stats["ignored"] += ignored
+			else:
+				# Individual insert mode
+				for p in prepared:
+					inserted, ignored = await db.insert_videos_normalized_columns(_to_columns([p]))
+					stats["inserted"] += inserted
+					stats["ignored"] += ignored
 
 	return stats
 
 
 async def main(language: str = "es") -> None:
-	load_dotenv()
 	await db.init_db(language=language)
 	stats = await run_normalization()
 	await db.close_db()
@@ -387,5 +490,7 @@ if __name__ == "__main__":
 	lang_group.add_argument("--ES", action="store_const", const="es", dest="lang", help="Use Spanish tables (default)")
 	parser.set_defaults(lang="es")
 	args = parser.parse_args()
-	
+
+	# Read .env once, before the event loop starts.
+	load_dotenv()
 	asyncio.run(main(args.lang))